@@ -61,6 +61,28 @@ def compute_up_level(target,num):
 			else:
 				k = k+1
 		return list
+
+
+def compute_up_level_bounded(target, bound):
+	"""
+	Generates, in increasing order, the integers in the sequence (target*2^k -1)/3 
+	that are <= bound, leaving out 1.  
+	
+	Only every other k gives an integer (k even when target is 1 mod 3 and k odd when 
+	target is 2 mod 3) so after the first term c the next one is always 4*c+1.  
+	This means no powers of 2 get computed and we stop exactly at the bound.
+	"""
+	if target%3 == 0:
+		return
+	elif target%3 == 1:
+		c = (4*target - 1)//3
+	else:
+		c = (2*target - 1)//3
+	if c == 1:		#Only happens for target 1 which is its own first term.
+		c = 5
+	while c <= bound:
+		yield c
+		c = 4*c + 1
 		
 		
 def create_up_level_dict(num_levels, bound):
@@ -75,20 +97,13 @@ def create_up_level_dict(num_levels, bound):
 	level_dict = {}
 	level_dict[0] = [1]
 	
-	#Estimating the num we need for compute_up_level using the fact 
-	#that in the level the number increases by approximately 4 from one to the next.
-	num_est = 2+math.ceil(math.log(bound,2))
-	print "num_est is: ", num_est
 	cur_level = 0
 	while cur_level < num_levels:
 		next_level = cur_level + 1
 		if next_level not in level_dict:
 			level_dict[next_level] = []
 		for target in level_dict[cur_level]:
-			level = compute_up_level(target,num_est)
-			if 1 in level:
-				level.remove(1)
-			level_dict[next_level].extend([x for x in level if x <= bound])
+			level_dict[next_level].extend(compute_up_level_bounded(target,bound))
 			
 		cur_level = next_level
 		
@@ -84,6 +84,28 @@ def compute_up_level(target,num):
 			else:
 				k = k+1
 		return list
+
+
+def compute_up_level_bounded(target, bound):
+	"""
+	Generates, in increasing order, the integers in the sequence (target*2^k -1)/3 
+	that are <= bound, leaving out 1.  
+	
+	Only every other k gives an integer (k even when target is 1 mod 3 and k odd when 
+	target is 2 mod 3) so after the first term c the next one is always 4*c+1.  
+	This means no powers of 2 get computed and we stop exactly at the bound.
+	"""
+	if target%3 == 0:
+		return
+	elif target%3 == 1:
+		c = (4*target - 1)//3
+	else:
+		c = (2*target - 1)//3
+	if c == 1:		#Only happens for target 1 which is its own first term.
+		c = 5
+	while c <= bound:
+		yield c
+		c = 4*c + 1
 		
 """		
 #################################
@@ -313,17 +335,10 @@ def bounded_graph(num_levels, bound):
 	graph.add_node(node_dict[1])
 	cur_level = [1]		
 	
-	#Estimating the num we need for compute_up_level using the fact 
-	#that in the level the number increases by approximately 4 from one to the next.
-	num_est = 2+math.ceil(math.log(bound,2))
-	
 	for i in range(num_levels):
 		next_level = []
 		for target in cur_level:
-			temp = compute_up_level(target, num_est)
-			if 1 in temp:
-				temp.remove(1)
-			trimmed_temp = [x for x in temp if x<= bound]
+			trimmed_temp = list(compute_up_level_bounded(target, bound))
 			for up_number in trimmed_temp:
 				#node_dict[up_number] = pydot.Node(str(up_number%MODULUS) + '\n'+str(up_number))
 				node_dict[up_number] = pydot.Node(str(int(get_length(up_number))) + '\n'+str(up_number), style="filled", fillcolor=color_dict[get_half(up_number)])
@@ -378,17 +393,13 @@ def graph_series(start_num, min_lg2_bound, max_lg2_bound):
 		graphs[i].add_node(node_dict[start_num])
 				
 		cur_level = [start_num]
-		#Estimating the num we need for compute_up_level
-		num_est = 2+i
+		bound = 2**i
 		
 		#Creating the ith graph
 		while len(cur_level) > 0:
 			next_level = []
 			for target in cur_level:
-				temp = compute_up_level(target, num_est)
-				if 1 in temp:
-					temp.remove(1)
-				trimmed_temp = [x for x in temp if x<= 2**i]
+				trimmed_temp = list(compute_up_level_bounded(target, bound))
 				for up_number in trimmed_temp:
 					if up_number in seen_list:
 						graphs[i].add_node(node_dict[up_number])
@@ -468,21 +479,15 @@ def graph_stats_nograph(start_num, min_lg2_bound, max_lg2_bound):
 	for i in range(min_lg2_bound, max_lg2_bound+1):
 		cur_level = [start_num]
 		seen_list = [start_num]
-
-		#Estimating the num we need for compute_up_level
-		num_est = 2+i
+		bound = 2**i
 		
 		#Creating the ith graph
 		while len(cur_level) > 0:
 			next_level = []
 			for target in cur_level:
-				temp = compute_up_level(target, num_est)
-				if 1 in temp:
-					temp.remove(1)
-				trimmed_temp = [x for x in temp if x<= 2**i]
-				seen_list.extend(trimmed_temp)
-				next_level.extend(trimmed_temp)
-			cur_level = [x for x in next_level]			
+				next_level.extend(compute_up_level_bounded(target, bound))
+			seen_list.extend(next_level)
+			cur_level = next_level
 					
 		print "%d nodes for %d bits \n"%(len(seen_list),i)
 		
@@ -6,6 +6,10 @@ B bits or 2^B for some B.
 
 UPDATE:  Parallel version added which can use py.cloud.  
 
+UPDATE:  Local multiprocessing version added since PiCloud is no longer around.  
+
+UPDATE:  Coordinator/worker version added for spreading a run over our own machines.  
+
 TODO:  Load level parallel version designed to use py.cloud so that work is equally distributed. 
 
 TODO:  Refactor code to clean it up.
@@ -57,6 +61,33 @@ up is smaller than the number.  i.e. 5<-3
 """
 import math
 import time
+import os
+import pickle
+import heapq
+import array
+import zlib
+import multiprocessing
+import multiprocessing.managers
+import Queue
+import socket
+import threading
+import random
+import json
+
+try:
+	import numpy as np
+except ImportError:		#Without numpy the levels are just lists of python ints.
+	np = None
+
+try:
+	import tracemalloc
+except ImportError:		#Python 2.  The level metrics use the peak RSS instead.
+	tracemalloc = None
+
+try:
+	import resource
+except ImportError:
+	resource = None
 
 
 #################################
@@ -84,6 +115,41 @@ def compute_up_level(target,num):
 			else:
 				k = k+1
 		return list
+
+
+def compute_up_level_bounded(target, bound):
+	"""
+	Generates, in increasing order, the integers in the sequence (target*2^k -1)/3 
+	that are <= bound, leaving out 1.  
+	
+	Only every other k gives an integer (k even when target is 1 mod 3 and k odd when 
+	target is 2 mod 3) so after the first term c the next one is always 4*c+1.  
+	This means no powers of 2 get computed and we stop exactly at the bound.
+	"""
+	if target%3 == 0:
+		return
+	elif target%3 == 1:
+		c = (4*target - 1)//3
+	else:
+		c = (2*target - 1)//3
+	if c == 1:		#Only happens for target 1 which is its own first term.
+		c = 5
+	while c <= bound:
+		yield c
+		c = 4*c + 1
+
+def get_first_up_level(target):
+	"""
+	Returns the first term of compute_up_level_bounded(target, bound) 
+	ignoring the bound.  target must not be divisible by 3.
+	"""
+	if target%3 == 1:
+		c = (4*target - 1)//3
+	else:
+		c = (2*target - 1)//3
+	if c == 1:		#Only happens for target 1 which is its own first term.
+		c = 5
+	return c
 		
 		
 
@@ -98,9 +164,25 @@ def compute_up_level(target,num):
 def get_length(n):
 	"""
 	Length here is defined as the length of the binary
-	representation of the number.
+	representation of the number.  (Well, one less than that, 
+	it's floor(log2(n)) but computed exactly without any floats.)
 	"""
-	return math.floor(math.log(n,2))
+	return n.bit_length() - 1
+	
+def get_top_bits(n, length):
+	"""
+	Returns the leading four bits of n as a number from 8 to 15 
+	where length = get_length(n).  Numbers with less than four bits 
+	are padded with zeros on the right.
+	"""
+	if length >= 3:
+		return n >> (length-3)
+	else:
+		return n << (3-length)
+	
+#The color of a number only depends on its top four bits:  1000 is red, 
+#1001 through 1011 are green and 11xx are blue.  Indexed by top bits - 8.
+TOP_BITS_COLOR = (-1, 0, 0, 0, 1, 1, 1, 1)
 	
 def get_half(n):
 	"""
@@ -115,33 +197,16 @@ def get_half(n):
 	blue	[3*2^(c-1), 2^(c+1)]		1
 	
 	"""
-	length = get_length(n)
-	center = 3*(2**(length-1))
-	short_cut = 2**length + 2**(length-3)
-	#print "The center is ", center
-	#print "The short_cut is ", short_cut
-	if n < center:
-		if n <short_cut:
-			return -1
-		else:
-			return 0
-	else:
-		return 1
+	return TOP_BITS_COLOR[get_top_bits(n, get_length(n)) - 8]
 
-def get_descendant_parity(n):
+def get_parity_from_data(class_mod3, length, color):
 	"""
-	This returns 0 if all of the lengths of the numbers 
-	in the next level up that go through n are even. It returns 
-	0 if all of the lengths of the numbers in the next level up 
-	that go through n are odd and -1 if there are no numbers that 
-	go through n.
+	Returns the descendant parity (see get_descendant_parity) of a number 
+	from its class mod 3, its length and its color.
 	"""
-	length = get_length(n)
-	color = get_half(n)
-	#print "Length: %d, Color: %d, mod3 class: %d"%(length, color, n%3)
-	if n%3 == 0:
+	if class_mod3 == 0:
 		return -1
-	elif n%3 == 1:
+	elif class_mod3 == 1:
 		if color < 1:  #Color red or green.
 			if length%2==1:  #Odd length
 				return 1
@@ -163,52 +228,51 @@ def get_descendant_parity(n):
 				return 1
 			else:
 				return 0
+
+def get_descendant_parity(n):
+	"""
+	This returns 0 if all of the lengths of the numbers 
+	in the next level up that go through n are even. It returns 
+	0 if all of the lengths of the numbers in the next level up 
+	that go through n are odd and -1 if there are no numbers that 
+	go through n.
+	"""
+	return get_data(n)[3]
+
+def make_data_table():
+	"""
+	Builds the lookup table used by get_data.  The entry for class_mod3, 
+	top_bits and length%2 is (color, parity) and sits at index
+	16*class_mod3 + 2*(top_bits - 8) + length%2.
+	"""
+	table = []
+	for class_mod3 in range(3):
+		for top_bits in range(8,16):
+			for length_parity in range(2):
+				color = TOP_BITS_COLOR[top_bits - 8]
+				table.append((color, get_parity_from_data(class_mod3, length_parity, color)))
+	return table
+
+DATA_TABLE = make_data_table()
 				
 def get_data(n):
 	"""
 	Function that returns a list of all of the things we might want 
 	to know about a node at once.  Implemented to cut down on the number 
 	of calls when compiling statistics.
+	
+	Everything comes from n%3, the bit length of n and its top four bits 
+	through DATA_TABLE so there are no floats or powers of 2 here.  (The 
+	bodies of get_length and get_top_bits are inlined since this gets called 
+	on every node.)
 	"""
 	class_mod3 = n%3
-	length = int(get_length(n))
-	
-	#now get the 'color'
-	center = 3*(2**(length-1))
-	short_cut = 2**length + 2**(length-3)
-	if n < center:
-		if n <short_cut:
-			color = -1
-		else:
-			color = 0
-	else:
-		color = 1
-
-	#finally get the descendant parity
-	if class_mod3 == 0:
-		parity = -1
-	elif class_mod3 == 1:
-		if color < 1:  #Color red or green.
-			if length%2==1:  #Odd length
-				parity = 1
-			else:
-				parity = 0
-		else:  #Color blue
-			if length%2 ==1:
-				parity = 0
-			else:
-				parity = 1
+	length = n.bit_length() - 1
+	if length >= 3:
+		top_bits = n >> (length-3)
 	else:
-		if color < 1:  #Color red or green.
-			if length%2==1:  #Odd length
-				parity = 0
-			else:
-				parity = 1
-		else:  #Color blue
-			if length%2 ==1:
-				parity = 1
-			else:
-				parity = 0
+		top_bits = n << (3-length)
+	color, parity = DATA_TABLE[16*class_mod3 + 2*top_bits - 16 + (length & 1)]
 	
 	return (class_mod3,length,color,parity) 
 	
@@ -217,6 +281,20 @@ def max_poss_of_length(j):
 		return 1
 	else:
 		return 2**(j-1)
+
+def get_subtree_size(root, lg2_bound):
+	"""
+	The size of the subtree of root under 2**lg2_bound from the heuristic in 
+	the NOTES on load leveling:  the number of nodes in it is about 
+	proportional to this.
+	"""
+	class_mod3 = root%3
+	if class_mod3 == 0:
+		return 1.0
+	elif class_mod3 == 1:
+		return 2.0**(lg2_bound - get_length(root))
+	else:
+		return 2.0**(lg2_bound - get_length(root) - 1)
 		
 #################################
 #
@@ -225,10 +303,203 @@ def max_poss_of_length(j):
 #################################	
 
 		
+#Counts are kept as 64 bit ints.  ('l' is 64 bits on the 64 bit linux boxes we run on.)
+COUNT_TYPECODE = 'l'
+
+#Position of a number's (class_mod3, color) cell within its length's block of 9 cells 
+#in a PropCounter.  Indexed by 8*class_mod3 + top bits - 8.
+TOP_BITS_CELL = tuple(3*class_mod3 + color + 1 for class_mod3 in range(3) for color in TOP_BITS_COLOR)
+
+if np is not None:
+	DATA_TABLE_COLOR = np.array([color for color, parity in DATA_TABLE], dtype=np.int64)
+	DATA_TABLE_PARITY = np.array([parity for color, parity in DATA_TABLE], dtype=np.int64)
+
+def get_length_array(level):
+	"""
+	get_length for every number in level, a numpy uint64 array.  Returns an 
+	int64 array.  
+	
+	The exponent from np.frexp of the numbers as float64's is the bit length, 
+	except that a number with more than 53 bits can round up to the next power 
+	of 2.  Those are the ones with nothing left after shifting off length bits 
+	and get one taken off.
+	"""
+	length = np.frexp(level.astype(np.float64))[1].astype(np.int64) - 1
+	length = np.minimum(length, 63)
+	is_rounded = (level >> np.maximum(length, 0).astype(np.uint64)) == 0
+	length[is_rounded] = length[is_rounded] - 1
+	return length
+
+def get_data_array(level):
+	"""
+	get_data for every number in level, a numpy uint64 array of nonzero 
+	numbers.  Returns (class_mod3, length, color, parity) as four int64 arrays 
+	holding the same values get_data gives for each number.  The color and 
+	parity come from DATA_TABLE through the top four bits like in get_data.
+	"""
+	class_mod3 = (level % np.uint64(3)).astype(np.int64)
+	length = get_length_array(level)
+	top_bits = level >> np.maximum(length - 3, 0).astype(np.uint64)
+	top_bits = (top_bits << np.maximum(3 - length, 0).astype(np.uint64)).astype(np.int64)
+	table_index = 16*class_mod3 + 2*top_bits - 16 + (length & 1)
+	return class_mod3, length, DATA_TABLE_COLOR[table_index], DATA_TABLE_PARITY[table_index]
+
+class PropCounter(object):
+	"""
+	Counts of nodes by the properties (class_mod3,length,color,parity) 
+	returned by get_data.  This takes the place of a dictionary keyed by those 
+	tuples.
+	
+	The counts live in one flat array of 64 bit ints laid out as 
+	[length][class_mod3][color], i.e. the count for a key is at index 
+	9*length + 3*class_mod3 + color + 1.  Parity isn't stored since it is 
+	determined by the other three.  The array grows when longer numbers are 
+	added so merging is just adding up two arrays in place.
+	
+	keys(), values() and [key] work like they did for the dictionaries 
+	(only keys with nonzero counts show up) so the code writing the 
+	statistics works with either.  Pickling goes through to_bytes so 
+	shipping one between processes only costs a few hundred bytes.
+	"""
+	
+	def __init__(self, num_lengths=0):
+		self.counts = array.array(COUNT_TYPECODE, [0])*(9*num_lengths)
+	
+	def num_lengths(self):
+		return len(self.counts)//9
+	
+	def grow(self, num_lengths):
+		"""
+		Makes room for numbers with length < num_lengths.
+		"""
+		if num_lengths > self.num_lengths():
+			self.counts.extend(array.array(COUNT_TYPECODE, [0])*(9*num_lengths - len(self.counts)))
+	
+	def add(self, n):
+		"""
+		Counts the number n.  (This is get_data inlined.)
+		"""
+		length = n.bit_length() - 1
+		if length >= 3:
+			top_bits = n >> (length-3)
+		else:
+			top_bits = n << (3-length)
+		index = 9*length + TOP_BITS_CELL[8*(n%3) + top_bits - 8]
+		if index >= len(self.counts):
+			self.grow(length+1)
+		self.counts[index] += 1
+	
+	def add_list(self, list):
+		"""
+		Counts every number in list.
+		"""
+		counts = self.counts
+		for n in list:
+			length = n.bit_length() - 1
+			if length >= 3:
+				top_bits = n >> (length-3)
+			else:
+				top_bits = n << (3-length)
+			index = 9*length + TOP_BITS_CELL[8*(n%3) + top_bits - 8]
+			if index >= len(counts):
+				self.grow(length+1)
+			counts[index] += 1
+	
+	def add_array(self, level):
+		"""
+		Counts every number in level, a numpy uint64 array.  Does the same as 
+		add_list a whole level at a time:  the index of each number goes into 
+		one array (see get_data_array) and np.bincount counts them.
+		"""
+		if len(level) == 0:
+			return
+		class_mod3, length, color, parity = get_data_array(level)
+		cell_counts = np.bincount(9*length + 3*class_mod3 + color + 1)
+		self.grow(len(cell_counts)//9 + 1)
+		counts = self.counts
+		for index in np.flatnonzero(cell_counts):
+			counts[index] += int(cell_counts[index])
+	
+	def add_props(self, props, count=1):
+		"""
+		Adds count to the count for the key props = (class_mod3,length,color,parity).
+		"""
+		class_mod3, length, color = props[0], props[1], props[2]
+		self.grow(length+1)
+		self.counts[9*length + 3*class_mod3 + color + 1] += count
+	
+	def merge(self, other):
+		"""
+		Adds the counts in other (another PropCounter) to this one in place.
+		"""
+		self.grow(other.num_lengths())
+		counts = self.counts
+		for index, count in enumerate(other.counts):
+			if count:
+				counts[index] += count
+		return self
+	
+	def total(self):
+		return sum(self.counts)
+	
+	def items(self):
+		"""
+		Returns a list of (key, count) for the keys with nonzero counts.
+		"""
+		item_list = []
+		for index, count in enumerate(self.counts):
+			if count:
+				length, cell = divmod(index, 9)
+				class_mod3, color = divmod(cell, 3)
+				color = color - 1
+				props = (class_mod3, length, color, get_parity_from_data(class_mod3, length, color))
+				item_list.append((props, count))
+		return item_list
+	
+	def keys(self):
+		return [props for props, count in self.items()]
+	
+	def values(self):
+		return [count for count in self.counts if count]
+	
+	def __getitem__(self, props):
+		index = 9*props[1] + 3*props[0] + props[2] + 1
+		if index < len(self.counts):
+			return self.counts[index]
+		return 0
+	
+	def __eq__(self, other):
+		return isinstance(other, PropCounter) and self.items() == other.items()
+	
+	def __ne__(self, other):
+		return not self == other
+	
+	def to_bytes(self):
+		"""
+		Returns a compact string holding the counts.  See prop_counter_from_bytes.
+		"""
+		return zlib.compress(self.counts.tostring())
+	
+	def __getstate__(self):
+		return self.to_bytes()
+	
+	def __setstate__(self, state):
+		self.counts = array.array(COUNT_TYPECODE)
+		self.counts.fromstring(zlib.decompress(state))
+		
+def prop_counter_from_bytes(data):
+	"""
+	Rebuilds a PropCounter from the string returned by its to_bytes method.
+	"""
+	prop_dict = PropCounter()
+	prop_dict.__setstate__(data)
+	return prop_dict
+
+		
 def get_stats(list):
 	"""
-	This takes a list and compiles a dictionary with number of things on the list that 
-	have different properties.  The keys for the dictionary are a tuple returned by 
+	This takes a list and compiles a PropCounter with number of things on the list that 
+	have different properties.  The keys for the counter are a tuple returned by 
 	get_data(n) which have the following ranges:
 	
 	class_mod3	0,1,2
@@ -240,38 +511,26 @@ def get_stats(list):
 	There will actually be fewer because for small lengths, not all numbers don't exist for all possible
 	keys.
 	"""
-	#initialize the property dictionary
-	prop_dict = {}
+	prop_dict = PropCounter()
+	prop_dict.add_list(list)
+	return prop_dict
 
-	for n in list:
-		props = get_data(n)
-		if props in prop_dict:
-			prop_dict[props] = prop_dict[props] + 1
-		else:
-			prop_dict[props] = 1
-	
+def get_stats_array(level):
+	"""
+	The same as get_stats for a numpy uint64 array of numbers, done in one 
+	vectorized pass instead of a get_data call per number.  (See 
+	get_data_array.)
+	"""
+	prop_dict = PropCounter()
+	prop_dict.add_array(level)
 	return prop_dict
 
 def merge_props(prop_dict1, prop_dict2):
 	"""
-	This assumes that both prop_dict1 and prop_dict2 are dictionaries of the type created by 
-	get_stats and then will merge them into one dictionary.
-	
-	TODO:  Check whether it's faster to have prop_dict1 or prop_dict2 be the one with fewer keys.
-	At a guess I would say prop_dict1 smaller.
+	This assumes that both prop_dict1 and prop_dict2 are PropCounters of the type created by 
+	get_stats and adds the counts in prop_dict2 to prop_dict1 IN PLACE.  Returns prop_dict1.
 	"""
-	prop_dict = {}
-	#NOTE: Don't use .copy() here because need a real copy and not a shallow copy!
-	for key in prop_dict1.keys():
-		prop_dict[key] = prop_dict1[key]
-		
-	for key in prop_dict2.keys():
-		if key in prop_dict1.keys():
-			prop_dict[key] = prop_dict1[key] + prop_dict2[key]
-		else:
-			prop_dict[key] = prop_dict2[key]
-
-	return prop_dict
+	return prop_dict1.merge(prop_dict2)
 		
 
 #################################
@@ -287,6 +546,7 @@ def get_node_list(start_num, lg2_bound):
 	that go through start_num and are bounded by lg2_bound.
 	"""
 
+	bound = 2**lg2_bound
 	cur_level = [start_num]
 	seen_list = [start_num]
 	
@@ -294,18 +554,14 @@ def get_node_list(start_num, lg2_bound):
 	while len(cur_level) > 0:
 		next_level = []
 		for target in cur_level:
-			temp = compute_up_level(target, 2+ int((lg2_bound - get_length(target))/2)) #Note:  How many terms we need
-			if 1 in temp:										#depends on the length.  This speeds things up
-				temp.remove(1)									#even with an extra call to get_length.
-			trimmed_temp = [x for x in temp if x<= 2**lg2_bound]
-			seen_list.extend(trimmed_temp)
-			next_level.extend(trimmed_temp)
-		cur_level = [x for x in next_level]			
+			next_level.extend(compute_up_level_bounded(target, bound))
+		seen_list.extend(next_level)
+		cur_level = next_level
 
 	return seen_list
 	
 
-def get_node_list_props(start_num, lg2_bound):
+def get_node_list_props(start_num, lg2_bound, depth_first=False, level_hook=None):
 	"""
 	Returns a property dictionary for the bounded collatz sequences 
 	that go through start_num and are bounded by lg2_bound.
@@ -315,28 +571,23 @@ def get_node_list_props(start_num, lg2_bound):
 	
 	CAVEAT NOTE: !!!!  We include start_num in the prop_dict!!!
 	
+	If depth_first is True the graph is walked depth first (see 
+	get_node_list_props_depth_first) instead of a level at a time.
+	
+	level_hook works as in get_node_list_props_from_list.
+	
 	"""
+	return get_node_list_props_from_list([start_num], lg2_bound, depth_first, level_hook=level_hook)
 
-	cur_level = [start_num]
-	prop_dict = get_stats(cur_level)
-	cur_prop_dict = {}
-	
-	#Creating the ith graph
-	while len(cur_level) > 0:
-		next_level = []
-		for target in cur_level:
-			temp = compute_up_level(target, 2+ int((lg2_bound - get_length(target))/2)) #Note:  How many terms we need
-			if 1 in temp:										#depends on the length.  This speeds things up
-				temp.remove(1)									#even with an extra call to get_length.
-			trimmed_temp = [x for x in temp if x<= 2**lg2_bound]
-			next_level.extend(trimmed_temp)
-		cur_level = [x for x in next_level]	
-		cur_prop_dict = get_stats(cur_level)
-		prop_dict = merge_props(cur_prop_dict, prop_dict)
+class JobCancelled(Exception):
+	"""
+	Raised by the cancel_check of a walk to stop it.  (See SharedPropSlots.cancel.)
+	"""
+	pass
 
-	return prop_dict
+CANCEL_CHECK_NODES = 2**16	#Nodes the depth first walk finishes between calls to cancel_check.
 
-def get_node_list_props_from_list(start_list, lg2_bound):
+def get_node_list_props_from_list(start_list, lg2_bound, depth_first=False, cancel_check=None, shard_file=None, level_hook=None):
 	"""
 	Returns a property dictionary for the bounded collatz sequences 
 	that go through an element in start_list and are bounded by lg2_bound.
@@ -348,27 +599,362 @@ def get_node_list_props_from_list(start_list, lg2_bound):
 	
 	Also:  start_list is assumed to be a list of odd integers.
 	
+	If depth_first is True the graph is walked depth first (see 
+	get_node_list_props_depth_first) instead of a level at a time.  Otherwise 
+	the levels are numpy arrays when numpy is installed (see 
+	get_node_list_props_array).
+	
+	If cancel_check is given it's called every so often during the walk (every 
+	level, or every CANCEL_CHECK_NODES nodes depth first) and can stop the walk 
+	by raising JobCancelled.
+	
+	If shard_file is given the counts are also saved there as a shard (see 
+	get_shard) so they can be merged with other runs' by merge_shard_files.
+	
+	If level_hook is given it's called after each level is expanded as 
+	level_hook(lg2_bound, level_number, level, big_level, seconds) where level 
+	is the level (a list, or a numpy array with the numbers over NUMPY_LIMIT in 
+	the list big_level) and seconds is how long expanding and counting it took.  
+	(See LevelMetricsWriter.)  Depth first walks have no levels and never call it.
+	
 	"""
-
+	if shard_file is not None:
+		prop_dict = get_node_list_props_from_list(start_list, lg2_bound, depth_first, cancel_check, level_hook=level_hook)
+		save_shard(shard_file, get_shard(start_list, lg2_bound, prop_dict))
+		return prop_dict
+	if depth_first:
+		return get_node_list_props_depth_first(start_list, lg2_bound, cancel_check)
+	if np is not None:
+		return get_node_list_props_array(start_list, lg2_bound, cancel_check, level_hook)
+
+	bound = 2**lg2_bound
 	cur_level = start_list
 	prop_dict = get_stats(cur_level)
-	cur_prop_dict = {}
+	level_number = 0
 	
 	#Creating the ith graph
 	while len(cur_level) > 0:
+		if cancel_check is not None:
+			cancel_check()
+		level_time = time.time()
 		next_level = []
 		for target in cur_level:
-			temp = compute_up_level(target, 2+ int((lg2_bound - get_length(target))/2)) #Note:  How many terms we need
-			if 1 in temp:										#depends on the length.  This speeds things up
-				temp.remove(1)									#even with an extra call to get_length.
-			trimmed_temp = [x for x in temp if x<= 2**lg2_bound]
-			next_level.extend(trimmed_temp)
-		cur_level = [x for x in next_level]	
-		cur_prop_dict = get_stats(cur_level)
-		prop_dict = merge_props(cur_prop_dict, prop_dict)
+			next_level.extend(compute_up_level_bounded(target, bound))
+		prop_dict.add_list(next_level)
+		if level_hook is not None:
+			level_hook(lg2_bound, level_number, cur_level, [], time.time() - level_time)
+		cur_level = next_level
+		level_number = level_number + 1
+
+	return prop_dict
+
+NUMPY_LIMIT = 2**62	#Numbers up to here go in uint64 arrays.  (Room to compute 4*c+1 and (4*c-1)//3.)
+
+def get_first_up_level_array(level):
+	"""
+	The numpy version of get_first_up_level.  level is a uint64 array of 
+	numbers <= NUMPY_LIMIT, none divisible by 3, and the result is the uint64 
+	array of their first terms.
+	"""
+	is_mod1 = level % np.uint64(3) == np.uint64(1)
+	c = (level*np.uint64(2) - np.uint64(1))//np.uint64(3)
+	c[is_mod1] = (level[is_mod1]*np.uint64(4) - np.uint64(1))//np.uint64(3)
+	c[c == np.uint64(1)] = np.uint64(5)		#Only happens for target 1 which is its own first term.
+	return c
+
+def expand_level_array(level, bound):
+	"""
+	The numpy version of finding the next level in get_node_list_props_from_list.  
+	level is a uint64 array of numbers <= NUMPY_LIMIT.  Returns (next_level, big_list) 
+	where next_level is a uint64 array holding the numbers <= NUMPY_LIMIT out of 
+	compute_up_level_bounded(target, bound) for all the targets in level, and 
+	big_list is a list of the rest, the ones over NUMPY_LIMIT (only when bound is).
+	
+	All of the first terms are computed at once, then all of the 4*c+1's, and so 
+	on until every chain is past the bound.  A term is only multiplied by 4 if 
+	the result stays <= NUMPY_LIMIT so nothing ever overflows.  The chains that 
+	cross NUMPY_LIMIT are finished with python ints.
+	"""
+	cap = np.uint64(min(bound, NUMPY_LIMIT))
+	last_cap = (cap - np.uint64(1))//np.uint64(4)	#Largest c with 4*c+1 <= cap.
+	big_list = []
+	big_starts = []
+	
+	c = get_first_up_level_array(level[level % np.uint64(3) != 0])
+	if bound > NUMPY_LIMIT:
+		big_starts.extend([int(x) for x in c[c > cap]])
+	c = c[c <= cap]
+	
+	chain = [c]
+	while len(c) > 0:
+		if bound > NUMPY_LIMIT:
+			big_starts.extend([4*int(x) + 1 for x in c[c > last_cap]])
+		c = c[c <= last_cap]*np.uint64(4) + np.uint64(1)
+		chain.append(c)
+	
+	for x in big_starts:
+		while x <= bound:
+			big_list.append(x)
+			x = 4*x + 1
+	return np.concatenate(chain), big_list
+
+def get_node_list_props_array(start_list, lg2_bound, cancel_check=None, level_hook=None):
+	"""
+	Returns the same property dictionary as get_node_list_props_from_list 
+	walking the graph a level at a time with each level in a numpy uint64 array 
+	(see expand_level_array and PropCounter.add_array).  Besides being faster 
+	a level takes 8 bytes a number instead of a list slot and a python int.
+	
+	Numbers over NUMPY_LIMIT, which only show up when lg2_bound > 62, are 
+	kept as python ints in big_level and go through the old code.  Their 
+	descendants go back into the array once they are small enough.
+	"""
+	bound = 2**lg2_bound
+	prop_dict = get_stats(start_list)
+	cur_level = np.array([x for x in start_list if x <= NUMPY_LIMIT], dtype=np.uint64)
+	big_level = [x for x in start_list if x > NUMPY_LIMIT]
+	level_number = 0
+	
+	while len(cur_level) > 0 or len(big_level) > 0:
+		if cancel_check is not None:
+			cancel_check()
+		level_time = time.time()
+		next_level, next_big_level = expand_level_array(cur_level, bound)
+		for target in big_level:
+			next_big_level.extend(compute_up_level_bounded(target, bound))
+		small_list = [x for x in next_big_level if x <= NUMPY_LIMIT]
+		if small_list:
+			next_level = np.concatenate((next_level, np.array(small_list, dtype=np.uint64)))
+		next_big_level = [x for x in next_big_level if x > NUMPY_LIMIT]
+		prop_dict.add_array(next_level)
+		prop_dict.add_list(next_big_level)
+		if level_hook is not None:
+			level_hook(lg2_bound, level_number, cur_level, big_level, time.time() - level_time)
+		cur_level, big_level = next_level, next_big_level
+		level_number = level_number + 1
+	
+	return prop_dict
+
+def get_node_list_props_depth_first(start_list, lg2_bound, cancel_check=None):
+	"""
+	Returns the same property dictionary as get_node_list_props_from_list 
+	but walks the bounded graph depth first.  
+	
+	The walk keeps a stack holding one compute_up_level_bounded generator for 
+	each node on the path down from the current start_num and every node is 
+	counted as soon as it is generated.  So the memory needed is proportional 
+	to the depth of the graph instead of the width of its widest level, which 
+	is what made the 2^32 bound take about 4 GB.
+	
+	CAVEAT NOTE: !!!!  We include start_list in the prop_dict!!!
+	
+	"""
+	bound = 2**lg2_bound
+	prop_dict = PropCounter(lg2_bound+1)
+	add = prop_dict.add
+	checks_left = CANCEL_CHECK_NODES
+	
+	for start_num in start_list:
+		add(start_num)
+		stack = [compute_up_level_bounded(start_num, bound)]
+		while stack:
+			for n in stack[-1]:
+				add(n)
+				if n%3 != 0:		#Nodes divisible by 3 have nothing above them.
+					stack.append(compute_up_level_bounded(n, bound))
+				break
+			else:		#This generator is used up so go back down a level.
+				stack.pop()
+				if cancel_check is not None:
+					checks_left = checks_left - 1
+					if checks_left == 0:
+						cancel_check()
+						checks_left = CANCEL_CHECK_NODES
+	
+	return prop_dict
+
+LEVEL_METRICS_FILE = 'level_metrics.jsonl'
+
+def get_peak_memory():
+	"""
+	Returns (bytes, source) for the peak memory of this process so far:  from 
+	tracemalloc if it's tracing, otherwise the peak RSS (ru_maxrss, which is 
+	in kilobytes on linux).  (None, None) if neither is there.
+	"""
+	if tracemalloc is not None and tracemalloc.is_tracing():
+		return tracemalloc.get_traced_memory()[1], 'tracemalloc'
+	if resource is not None:
+		return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*1024, 'ru_maxrss'
+	return None, None
+
+def get_level_metrics(level, big_level, bound):
+	"""
+	Returns (width, pruned, mod3_zero) for a level of a walk (see level_hook 
+	in get_node_list_props_from_list):  the number of nodes in it, the number 
+	not divisible by 3 with no children because the bound cuts them all off, 
+	and the number divisible by 3 (which never have children).
+	"""
+	width = len(level) + len(big_level)
+	first_list = [get_first_up_level(x) for x in big_level if x%3 != 0]
+	mod3_zero = len([x for x in big_level if x%3 == 0])
+	if np is not None and isinstance(level, np.ndarray):
+		cap = np.uint64(min(bound, NUMPY_LIMIT))
+		mod3_zero = mod3_zero + int(np.count_nonzero(level % np.uint64(3) == np.uint64(0)))
+		first = get_first_up_level_array(level[level % np.uint64(3) != 0])
+		if bound > NUMPY_LIMIT:
+			first_list.extend([int(x) for x in first[first > cap]])
+			pruned = 0
+		else:
+			pruned = int(np.count_nonzero(first > cap))
+	else:
+		mod3_zero = mod3_zero + len([x for x in level if x%3 == 0])
+		first_list.extend([get_first_up_level(x) for x in level if x%3 != 0])
+		pruned = 0
+	pruned = pruned + len([x for x in first_list if x > bound])
+	return width, pruned, mod3_zero
+
+class LevelMetricsWriter(object):
+	"""
+	A level_hook (see get_node_list_props_from_list) that appends one line of 
+	JSON per level of a walk to file_name with
+	
+	lg2_bound			the bound of the walk
+	level				the level number (0 for the start list)
+	width				the number of nodes in the level
+	seconds				how long expanding and counting the level took
+	nodes_per_second	width/seconds
+	pruned				nodes with no children because of the bound
+	mod3_zero			nodes divisible by 3 (leaves)
+	peak_memory			peak memory of the process so far in bytes
+	memory_source		where peak_memory comes from (see get_peak_memory)
+	time				when the level finished (seconds since the epoch)
+	
+	plus label if one is given, to tell runs apart.  Each line is flushed 
+	when written so the file can be watched while the walk goes on.  If 
+	tracemalloc is there and not tracing yet it's started (which slows the 
+	walk down some).
+	"""
+	
+	def __init__(self, file_name=LEVEL_METRICS_FILE, label=None):
+		self.metrics_file = open(file_name, "a")
+		self.label = label
+		if tracemalloc is not None and not tracemalloc.is_tracing():
+			tracemalloc.start()
+	
+	def __call__(self, lg2_bound, level_number, level, big_level, seconds):
+		width, pruned, mod3_zero = get_level_metrics(level, big_level, 2**lg2_bound)
+		peak_memory, memory_source = get_peak_memory()
+		record = {'lg2_bound': lg2_bound, 'level': level_number, 'width': width, 'seconds': seconds, 
+			'nodes_per_second': width/seconds if seconds > 0 else None, 'pruned': pruned, 'mod3_zero': mod3_zero, 
+			'peak_memory': peak_memory, 'memory_source': memory_source, 'time': time.time()}
+		if self.label is not None:
+			record['label'] = self.label
+		self.metrics_file.write(json.dumps(record, sort_keys=True) + "\n")
+		self.metrics_file.flush()
+	
+	def close(self):
+		self.metrics_file.close()
+
+def get_node_list_props_sweep(start_list, min_lg2_bound, max_lg2_bound):
+	"""
+	Returns a dictionary whose key is the bound i and whose value is the 
+	property dictionary get_node_list_props_from_list(start_list, i) for every 
+	min_lg2_bound <= i <= max_lg2_bound, all from one depth first walk of the 
+	max_lg2_bound graph.
+	
+	The bound i graph is a subtree of the bound i+1 graph.  A node is in the 
+	bound i graph exactly when it and every node on the path from it down to 
+	its start number are <= 2^i, i.e. have at most i bits.  So the walk carries 
+	the largest bit length on the path along with each generator on the stack 
+	and counts each node only for the first bound it belongs to.  Adding those 
+	up from the smallest bound gives the counts for every bound.
+	
+	CAVEAT NOTE: !!!!  We include start_list in the prop_dict for every bound!!!
+	
+	"""
+	bound = 2**max_lg2_bound
+	first_dict = {}
+	for i in range(min_lg2_bound, max_lg2_bound+1):
+		first_dict[i] = PropCounter(max_lg2_bound+1)
+	
+	for start_num in start_list:
+		first_dict[min_lg2_bound].add(start_num)
+		stack = [(compute_up_level_bounded(start_num, bound), 0)]
+		while stack:
+			up_level, path_bits = stack[-1]
+			for n in up_level:
+				bits = n.bit_length()
+				if bits < path_bits:
+					bits = path_bits
+				if bits < min_lg2_bound:
+					first_dict[min_lg2_bound].add(n)
+				else:
+					first_dict[bits].add(n)
+				if n%3 != 0:		#Nodes divisible by 3 have nothing above them.
+					stack.append((compute_up_level_bounded(n, bound), bits))
+				break
+			else:		#This generator is used up so go back down a level.
+				stack.pop()
+	
+	#Everything in the bound i-1 graph is in the bound i graph too.
+	sweep_dict = {min_lg2_bound: first_dict[min_lg2_bound]}
+	for i in range(min_lg2_bound+1, max_lg2_bound+1):
+		sweep_dict[i] = merge_props(first_dict[i], sweep_dict[i-1])
+	
+	return sweep_dict
 
+def add_chains_to_props(chain_starts, lg2_bound, prop_dict, boundary_file):
+	"""
+	Each number c in chain_starts stands for the chain c, 4c+1, 16c+5, ... 
+	of predecessors of some node (see compute_up_level_bounded).  This walks 
+	depth first through everything in the lg2_bound graph that is on or above 
+	those chains, adds it to prop_dict and writes the boundary to 
+	boundary_file, one number per line.  Returns prop_dict.
+	
+	The boundary is the first number in each chain that is past 2^lg2_bound.  
+	Everything in a bigger bound's graph that isn't in this one is on or above 
+	the chain starting at one of these numbers.
+	"""
+	bound = 2**lg2_bound
+	add = prop_dict.add
+	
+	for c in chain_starts:
+		stack = [c]		#The next unchecked number of each chain on the path.
+		while stack:
+			c = stack[-1]
+			if c > bound:
+				boundary_file.write("%d\n"%(c))
+				stack.pop()
+			else:
+				stack[-1] = 4*c + 1
+				add(c)
+				if c%3 != 0:		#Nodes divisible by 3 have nothing above them.
+					stack.append(get_first_up_level(c))
+	
 	return prop_dict
 
+def get_node_list_props_boundary(start_list, lg2_bound, boundary_file):
+	"""
+	Returns the same property dictionary as get_node_list_props_from_list 
+	and writes the boundary of the graph (see add_chains_to_props) to 
+	boundary_file.
+	
+	CAVEAT NOTE: !!!!  We include start_list in the prop_dict!!!
+	
+	"""
+	prop_dict = get_stats(start_list)
+	chain_starts = [get_first_up_level(x) for x in start_list if x%3 != 0]
+	return add_chains_to_props(chain_starts, lg2_bound, prop_dict, boundary_file)
+
+def read_boundary_file(file_name):
+	"""
+	Generates the numbers in a boundary file written by add_chains_to_props.
+	"""
+	boundary_file = open(file_name, "r")
+	for line in boundary_file:
+		yield int(line)
+	boundary_file.close()
+
 
 
 
@@ -381,7 +967,34 @@ def get_node_list_props_from_list(start_list, lg2_bound):
 
 
 
-def create_stats_table(prop_dict):
+def get_stats_marginals(prop_dict):
+	"""
+	Adds up the counts of prop_dict in one pass over its keys into the 
+	dictionaries the report needs:
+	
+	class				count by class mod 3
+	length_class		count by (length, class mod 3)
+	class_parity		count by (class mod 3, parity)
+	class_color_parity	count by (class mod 3, color, parity)
+	
+	Missing keys count 0.
+	"""
+	marginals = {'class': {}, 'length_class': {}, 'class_parity': {}, 'class_color_parity': {}}
+	class_dict = marginals['class']
+	length_class_dict = marginals['length_class']
+	class_parity_dict = marginals['class_parity']
+	class_color_parity_dict = marginals['class_color_parity']
+	for (class_mod3, length, color, parity), count in prop_dict.items():
+		class_dict[class_mod3] = class_dict.get(class_mod3, 0) + count
+		key = (length, class_mod3)
+		length_class_dict[key] = length_class_dict.get(key, 0) + count
+		key = (class_mod3, parity)
+		class_parity_dict[key] = class_parity_dict.get(key, 0) + count
+		key = (class_mod3, color, parity)
+		class_color_parity_dict[key] = class_color_parity_dict.get(key, 0) + count
+	return marginals
+
+def create_stats_table(prop_dict, marginals=None):
 	"""
 	Takes a property list as generated by get_stats and processes it in terms of number and ratio that fall into 
 	each of the categories
@@ -397,7 +1010,12 @@ def create_stats_table(prop_dict):
 	
 	and PARITY refers to whether the nodes that follow are of even length or odd length or none
 	referred to by (0,1) respectively.
+	
+	marginals is get_stats_marginals(prop_dict) if it's already been made.
 	"""
+	if marginals is None:
+		marginals = get_stats_marginals(prop_dict)
+	
 	#Creating a color dictionary for the nodes
 	color_dict = {}
 	color_dict[1] = "blue"
@@ -408,153 +1026,1272 @@ def create_stats_table(prop_dict):
 	
 	
 	for mod3 in range(1,3):
-		total_count = sum([prop_dict[x] for x in prop_dict.keys() if x[0]==mod3])
+		total_count = marginals['class'].get(mod3, 0)
 		for parity in range(2):		
 			for color in range(-1,2):
-				count = sum([prop_dict[x] for x in prop_dict.keys() if x[0] == mod3 and x[2] == color and x[3] == parity])	
+				count = marginals['class_color_parity'].get((mod3, color, parity), 0)
 				w_str = w_str + "\t \t %8d \t %8s \t %8d \t %8d \t %3.5f\n"%(mod3,color_dict[color],parity,count,1.0*count/total_count)
 			w_str = w_str + '\n'
 		w_str = w_str + '\n'
 	return w_str
 
 
+def write_graph_stats(stats_file, i, prop_dict, prev_count):
+	"""
+	Writes the statistics for the i bit bound graph described by prop_dict to 
+	stats_file and returns the number of nodes in the graph.  prev_count is the 
+	number of nodes in the previous bound's graph.
+	
+	All of the tables are read from get_stats_marginals so prop_dict's keys 
+	are only gone through once.
+	"""
+	marginals = get_stats_marginals(prop_dict)
+	cur_count = sum(marginals['class'].values())
+	
+	print "%d nodes = %.2f bits of nodes for %d bits \n"%(cur_count,math.log(cur_count,2),i)
+			
+	#Now it's time to assemble some statistics
+	write_str = "%3d BIT BOUND: \n \n"%(i)
+	stats_file.write(write_str)
+	write_str = "\t Number of nodes: %22d  %20.2f bits\n"%(cur_count, math.log(cur_count,2))
+	stats_file.write(write_str)
+	write_str = "\t Number of previously seen nodes: %6d  %20.2f bits\n"%(prev_count,math.log(prev_count ,2))
+	stats_file.write(write_str)
+	write_str = "\t Number of new nodes: %18d  %20.2f bits\n"%(cur_count-prev_count,math.log(cur_count-prev_count ,2))
+	stats_file.write(write_str)
+	write_str = "\t Percentage of new nodes: %14.2f \n"%(1.0*(cur_count-prev_count)/cur_count)
+	stats_file.write(write_str)
+
+	
+	#Put together # of things in each congruence class
+	class0_count = marginals['class'].get(0, 0)
+	class1_count = marginals['class'].get(1, 0)
+	class2_count = marginals['class'].get(2, 0)
+
+	stats_file.write("\n")
+	stats_file.write("\t NUMBER OF NODES IN CONGRUENCE CLASSES MODULO 3 \n\n")
+	stats_file.write("\t \t 0 \t %8d \n"%(class0_count))
+	stats_file.write("\t \t 1 \t %8d \n"%(class1_count))
+	stats_file.write("\t \t 2 \t %8d \n"%(class2_count))
+	
+	#Put together # of things with even/odd descendents by congruence class
+	
+	class1_even_count = marginals['class_parity'].get((1, 0), 0)
+	class1_odd_count = marginals['class_parity'].get((1, 1), 0)
+	class2_even_count = marginals['class_parity'].get((2, 0), 0)
+	class2_odd_count = marginals['class_parity'].get((2, 1), 0)
+	
+	stats_file.write("\n")
+	stats_file.write("\t NUMBER OF NODES WITH EVEN/ODD DECENDANTS \n\n")
+	stats_file.write("\t %8s \t %8s \t %8s \t %8s \n "%('PARITY', 'COUNT', '1COUNT', '2COUNT'))
+	stats_file.write("\t %8s \t %8d \t %8d \t %8d \n "%('EVEN', class1_even_count + class2_even_count,class1_even_count,class2_even_count))
+	stats_file.write("\t %8s \t %8d \t %8d \t %8d \n "%('ODD', class1_odd_count + class2_odd_count,class1_odd_count,class2_odd_count))
+	
+	stats_file.write("\n")
+	stats_file.write("\t BREAKDOWN OF NODES\n\n")
+	w_str = create_stats_table(prop_dict, marginals)
+	stats_file.write(w_str)
+	
+	stats_file.write("\n")
+	stats_file.write("\t NUMBER OF NODES OF A GIVEN LENGTH \n\n")
+	stats_file.write("\t %8s \t %8s \t %8s \t %8s \t %8s \t %8s \t %8s \n"%('LENGTH','ACT. NODES','MAX POSS.', '% OF POSS.', '#0 MOD3','#1 MOD3','#2 MOD3'))
+	for j in range(i):
+		num_of_length0 = marginals['length_class'].get((j, 0), 0)
+		num_of_length1 = marginals['length_class'].get((j, 1), 0)
+		num_of_length2 = marginals['length_class'].get((j, 2), 0)
+		num_of_length = num_of_length0 + num_of_length1 + num_of_length2
+		
+		max_poss = max_poss_of_length(j)
+		stats_file.write("\t \t %d \t %8d \t %8d \t %3.5f \t %8d \t %8d \t %8d\n"%(j,num_of_length,max_poss,1.0*num_of_length/max_poss, num_of_length0, num_of_length1,num_of_length2))
+
+	stats_file.write("\n")
+	
+	return cur_count
+
+
+
 
 #################################
 #
-# Serial computation of statistics for a series 
-# of bounds in terms of bit sizes.  This is also the initial
-# prototype for the cloud version.
+# Saving files that other runs and processes read.
 #
 #################################	
 
-
-def graph_stats_nograph(start_num, min_lg2_bound, max_lg2_bound):
+def write_file_atomically(file_name, data):
 	"""
-	This function writes the statistics for the graphs without 
-	creating the graphs.  The entire purpose is to 
-	deal with the fact that at the bound of 15 or 16 
-	pydot becomes unweildy.
-
+	Writes the string data to file_name.  It's written under another name 
+	(unique to this process) first and then renamed, so anyone reading 
+	file_name sees either the old file or the whole new one, and a crash 
+	while writing leaves the old one alone.
 	"""
+	temp_name = '%s.%d.tmp'%(file_name, os.getpid())
+	temp_file = open(temp_name, "wb")
+	temp_file.write(data)
+	temp_file.close()
+	os.rename(temp_name, file_name)
 
-	stats_file = open('graph_stats.txt',"w")
-	prev_count = 1
-	
-	for i in range(min_lg2_bound, max_lg2_bound+1):
-	
-		#Initialization of property dictionary
-		prop_dict = {}
-		
-		
-		#Get the property dictionary data
-		#####
-		# Section A
-		#####
-		
-		### Do the initial levels
-		cur_level = [start_num]
-		for level in range(2):  #TUNE THIS BOUND FOR PARALLELISM  
-			cur_prop_dict = get_stats(cur_level)
-			prop_dict = merge_props(cur_prop_dict, prop_dict)
-			next_level = []
-			for target in cur_level:
-				temp = compute_up_level(target, 2+ int((i - get_length(target))/2)) #Note:  How many terms we need
-				if 1 in temp:										#depends on the length.  This speeds things up
-					temp.remove(1)									#even with an extra call to get_length.
-				trimmed_temp = [x for x in temp if x<= 2**i]
-				next_level.extend(trimmed_temp)
-			cur_level = [x for x in next_level]			
-		
-		###Split the list (which is cur_level).  
-		add_list = [x for x in cur_level if x%3 == 0]
-		split_list = [x for x in cur_level if x%3 != 0]
-		print "Subtree count: %d "%(len(split_list))
-		
-		###Add the mod3 = 0 class to prop_dict. 
-		prop_dict = merge_props(prop_dict, get_stats(add_list))
-		
-		###  Send the rest of the list out as 'separate jobs'
-		### Merge the separate jobs back into the property list.
-		for sub_start_num in split_list:
-			sub_prop_dict = get_node_list_props(sub_start_num,i)
-			prop_dict = merge_props(sub_prop_dict,prop_dict)
-		
-		#####
-		# End Section A
-		#####
+
+
+
+#################################
+#
+# Records of the statistics, one JSON line per bound, 
+# that runs append to and the report can be made from.
+#
+#################################	
+
+STATS_RECORDS_FILE = 'graph_stats.jsonl'
+
+def get_stats_record(start_num, lg2_bound, prop_dict, prev_count, wall_seconds=None, cpu_seconds=None):
+	"""
+	Returns the record of the statistics for the lg2_bound bit bound graph 
+	through start_num:  a dictionary with the keys
+	
+	start_num		the start number of the run
+	lg2_bound		the bound
+	counts			the counts of prop_dict (see PropCounter), the count of the 
+					nodes with (class_mod3, length, color) being at index 
+					9*length + 3*class_mod3 + color + 1
+	prev_count		the number of nodes in the previous bound's graph
+	wall_seconds	wall clock seconds it took to get prop_dict (None if not timed)
+	cpu_seconds		CPU seconds of this process it took (None if not timed)
+	finish_time		when the record was made (seconds since the epoch)
+	"""
+	return {'start_num': start_num, 'lg2_bound': lg2_bound, 'counts': list(PropCounter().merge(prop_dict).counts), 
+		'prev_count': prev_count, 'wall_seconds': wall_seconds, 'cpu_seconds': cpu_seconds, 'finish_time': time.time()}
+
+def prop_counter_from_record(record):
+	"""
+	Rebuilds the PropCounter of a record from get_stats_record.
+	"""
+	prop_dict = PropCounter()
+	prop_dict.counts = array.array(COUNT_TYPECODE, record['counts'])
+	return prop_dict
+
+def append_stats_record(file_name, record):
+	"""
+	Adds record to the end of file_name as one line of JSON.  Earlier runs' 
+	records are kept.
+	"""
+	records_file = open(file_name, "a")
+	records_file.write(json.dumps(record, sort_keys=True) + "\n")
+	records_file.close()
+
+def load_stats_records(file_name):
+	"""
+	Returns the list of all of the records in file_name, oldest first.  A 
+	last line left half written by a run that was killed is skipped.
+	"""
+	record_list = []
+	records_file = open(file_name, "r")
+	for line in records_file:
+		try:
+			record_list.append(json.loads(line))
+		except ValueError:
+			print "Skipping a bad line in %s"%(file_name)
+	records_file.close()
+	return record_list
+
+def write_graph_stats_record(stats_file, record):
+	"""
+	Writes the report for record to stats_file (see write_graph_stats) and 
+	returns the number of nodes in the graph.
+	"""
+	return write_graph_stats(stats_file, record['lg2_bound'], prop_counter_from_record(record), record['prev_count'])
+
+def write_bound_stats(stats_file, records_file, start_num, lg2_bound, prop_dict, prev_count, wall_seconds=None, cpu_seconds=None):
+	"""
+	What the drivers do with a finished bound:  appends its record to 
+	records_file (unless it's None) and writes its report to stats_file from 
+	the record.  Returns the number of nodes in the graph.
+	"""
+	record = get_stats_record(start_num, lg2_bound, prop_dict, prev_count, wall_seconds, cpu_seconds)
+	if records_file is not None:
+		append_stats_record(records_file, record)
+	return write_graph_stats_record(stats_file, record)
+
+def render_stats_records(records_file, stats_file_name='graph_stats.txt', start_num=1):
+	"""
+	Writes the report for the records of start_num in records_file to 
+	stats_file_name, a bound at a time.  When a bound was run more than once 
+	its latest record is used.
+	"""
+	record_dict = {}
+	for record in load_stats_records(records_file):
+		if record['start_num'] == start_num:
+			record_dict[record['lg2_bound']] = record
+	
+	stats_file = open(stats_file_name, "w")
+	for lg2_bound in sorted(record_dict.keys()):
+		write_graph_stats_record(stats_file, record_dict[lg2_bound])
+	stats_file.close()
+
+
+
+
+#################################
+#
+# Shards:  the counts for the subtrees of a list of roots 
+# saved so that runs made apart can be added up.
+#
+#################################	
+
+SHARD_KIND = 'collatz_graph_stats_shard'
+SHARD_VERSION = 2		#Version 1 shards had no top.
+
+def get_shard(root_list, lg2_bound, prop_dict, top=None):
+	"""
+	Returns the shard for the subtrees of root_list under 2**lg2_bound, 
+	whose counts are prop_dict:  a dictionary with the keys
+	
+	kind		SHARD_KIND
+	version		SHARD_VERSION
+	lg2_bound	the bound
+	roots		the sorted roots whose subtrees (roots included) are counted
+	top			None, or {'start': start_num, 'excluded': excluded_list} if the 
+				counts also have the top of the graph through start_num:  
+				everything in it but the subtrees of the sorted roots in 
+				excluded_list (see get_top_shard)
+	counts		the counts of prop_dict as in get_stats_record
+	"""
+	return {'kind': SHARD_KIND, 'version': SHARD_VERSION, 'lg2_bound': lg2_bound, 
+		'roots': sorted(root_list), 'top': top, 'counts': list(PropCounter().merge(prop_dict).counts)}
+
+def get_top_shard(start_num, lg2_bound, farm_break_point=None):
+	"""
+	Returns the shard for the top of the graph through start_num from 
+	get_farm_split (farm_break_point defaults to FARM_BREAK_POINT):  it counts everything but the subtrees of the farm roots, 
+	which are its top's excluded list.  The shards of those subtrees (from 
+	get_node_list_props_from_list, split up any way) merged with this one 
+	make the whole graph.
+	"""
+	if farm_break_point is None:
+		farm_break_point = FARM_BREAK_POINT
+	prop_dict, split_list = get_farm_split(start_num, lg2_bound, farm_break_point)
+	return get_shard([], lg2_bound, prop_dict, {'start': start_num, 'excluded': sorted(split_list)})
+
+def save_shard(file_name, shard):
+	"""
+	Writes shard to file_name as JSON (see write_file_atomically).
+	"""
+	write_file_atomically(file_name, json.dumps(shard, sort_keys=True))
+
+def load_shard(file_name):
+	"""
+	Returns the shard saved in file_name by save_shard.
+	"""
+	shard_file = open(file_name, "r")
+	shard = json.load(shard_file)
+	shard_file.close()
+	if shard.get('kind') != SHARD_KIND or shard.get('version') not in (1, SHARD_VERSION):
+		raise ValueError("%s is not a version %d shard."%(file_name, SHARD_VERSION))
+	shard.setdefault('top', None)
+	return shard
+
+def get_forward_odd(n):
+	"""
+	Returns the next odd number after n in its Collatz sequence.  This is 
+	the node of the graph that n is a child of.
+	"""
+	m = 3*n + 1
+	while m%2 == 0:
+		m = m//2
+	return m
+
+def find_shard_overlap(root_list1, root_list2, lg2_bound):
+	"""
+	Returns a root of root_list1 or root_list2 whose subtree overlaps the 
+	subtrees of the other list, or None if they don't overlap.  Two subtrees 
+	overlap when their roots are equal or one root is above the other, 
+	which is found by walking down the Collatz sequence of every root to 1 
+	(or until it leaves the bounded graph).
+	"""
+	bound = 2**lg2_bound
+	for root_list, other_list in ((root_list1, root_list2), (root_list2, root_list1)):
+		other_set = set(other_list)
+		for root in root_list:
+			n = root
+			while True:
+				if n in other_set:
+					return root
+				if n == 1 or n > bound:
+					break
+				n = get_forward_odd(n)
+	return None
+
+def find_top_overlap(top, root_list, lg2_bound):
+	"""
+	Returns a root of root_list whose subtree overlaps the top of a shard 
+	(see get_shard), or None if none do.  A subtree is clear of the top when 
+	walking down the Collatz sequence of its root reaches an excluded root 
+	before the start number.
+	"""
+	bound = 2**lg2_bound
+	excluded_set = set(top['excluded'])
+	for root in root_list:
+		n = root
+		while n not in excluded_set:
+			if n == top['start']:
+				return root
+			if n == 1 or n > bound:
+				break
+			n = get_forward_odd(n)
+	return None
+
+def merge_shards(shard1, shard2):
+	"""
+	Returns the shard for everything counted by shard1 and shard2.  Raises a 
+	ValueError if their bounds are different, they both have a top, or their 
+	subtrees overlap each other or the other's top (see find_shard_overlap 
+	and find_top_overlap), since then the counts can't just be added.  
+	Merging is associative so shards can be merged in any grouping.
+	"""
+	lg2_bound = shard1['lg2_bound']
+	if lg2_bound != shard2['lg2_bound']:
+		raise ValueError("Can't merge shards for the %d and %d bit bounds."%(lg2_bound, shard2['lg2_bound']))
+	if shard1['top'] is not None and shard2['top'] is not None:
+		raise ValueError("Can't merge two shards that both count the top of the %d bit graph."%(lg2_bound))
+	root = find_shard_overlap(shard1['roots'], shard2['roots'], lg2_bound)
+	if root is None and shard1['top'] is not None:
+		root = find_top_overlap(shard1['top'], shard2['roots'], lg2_bound)
+	if root is None and shard2['top'] is not None:
+		root = find_top_overlap(shard2['top'], shard1['roots'], lg2_bound)
+	if root is not None:
+		raise ValueError("Can't merge shards that both count the subtree of %d."%(root))
+	prop_dict = merge_props(prop_counter_from_record(shard1), prop_counter_from_record(shard2))
+	return get_shard(shard1['roots'] + shard2['roots'], lg2_bound, prop_dict, shard1['top'] or shard2['top'])
+
+def check_shard_covers_graph(shard, start_num):
+	"""
+	Raises a ValueError unless shard counts the whole graph through 
+	start_num:  either its top is for start_num and its roots are exactly 
+	the top's excluded roots, or it has no top and start_num is its only root.
+	"""
+	top = shard['top']
+	if top is None:
+		if shard['roots'] != [start_num]:
+			raise ValueError("The shards for the %d bit bound have no top shard (see get_top_shard) so they don't cover the graph through %d."%(shard['lg2_bound'], start_num))
+	elif top['start'] != start_num:
+		raise ValueError("The top shard for the %d bit bound is for start number %d, not %d."%(shard['lg2_bound'], top['start'], start_num))
+	elif set(shard['roots']) != set(top['excluded']):
+		raise ValueError("The shards for the %d bit bound are missing %d of the top shard's %d subtrees."%(shard['lg2_bound'], 
+			len(set(top['excluded']) - set(shard['roots'])), len(top['excluded'])))
+
+def merge_shard_files(file_list, out_file_name=None):
+	"""
+	Merges the shards saved in file_list, which must all be for the same 
+	bound, and returns the merged shard.  It's saved to out_file_name if 
+	that's given.
+	"""
+	shard = load_shard(file_list[0])
+	for file_name in file_list[1:]:
+		shard = merge_shards(shard, load_shard(file_name))
+	if out_file_name is not None:
+		save_shard(out_file_name, shard)
+	return shard
+
+def render_shard_stats(file_list, stats_file_name='graph_stats.txt', start_num=1):
+	"""
+	Merges the shards saved in file_list bound by bound and writes the report 
+	for each bound to stats_file_name (see write_graph_stats).  The shards of 
+	each bound have to cover the whole graph through start_num (see 
+	check_shard_covers_graph), normally a top shard from get_top_shard plus 
+	shards for its excluded subtrees, or a ValueError is raised before 
+	anything is written.
+	"""
+	bound_dict = {}
+	for file_name in file_list:
+		shard = load_shard(file_name)
+		lg2_bound = shard['lg2_bound']
+		if lg2_bound in bound_dict:
+			shard = merge_shards(bound_dict[lg2_bound], shard)
+		bound_dict[lg2_bound] = shard
+	for lg2_bound in bound_dict:
+		check_shard_covers_graph(bound_dict[lg2_bound], start_num)
+	
+	stats_file = open(stats_file_name, "w")
+	prev_count = 1
+	for lg2_bound in sorted(bound_dict.keys()):
+		prev_count = write_graph_stats(stats_file, lg2_bound, prop_counter_from_record(bound_dict[lg2_bound]), prev_count)
+	stats_file.close()
+
+
+
+
+#################################
+#
+# Checkpoints so that long runs can be restarted 
+# without losing the subtrees that are already done.
+#
+#################################	
+
+CHECKPOINT_INTERVAL = 600	#Seconds between checkpoints during a bound.
+
+def load_checkpoint(file_name, start_num):
+	"""
+	Returns the checkpoint for start_num saved in file_name by save_checkpoint 
+	or a new empty checkpoint if there isn't one (or file_name is None).  A 
+	checkpoint is a dictionary with the keys
+	
+	start_num	the start number of the run
+	finished	dictionary whose key is a finished bound and whose value is its property dictionary
+	lg2_bound	the bound being worked on (None if there isn't one)
+	props		property dictionary of everything done so far for lg2_bound
+	roots		all of the subtree roots that lg2_bound was split into
+	done		the roots whose subtrees are already in props
+	"""
+	if file_name is not None and os.path.exists(file_name):
+		checkpoint_file = open(file_name, "rb")
+		checkpoint = pickle.load(checkpoint_file)
+		checkpoint_file.close()
+		if checkpoint['start_num'] == start_num:
+			return checkpoint
+	
+	return {'start_num': start_num, 'finished': {}, 'lg2_bound': None, 'props': None, 'roots': [], 'done': []}
+
+def save_checkpoint(file_name, checkpoint):
+	"""
+	Writes checkpoint to file_name (nothing happens if file_name is None) 
+	with write_file_atomically, so a crash while saving leaves the previous 
+	checkpoint alone.
+	"""
+	if file_name is None:
+		return
+	write_file_atomically(file_name, pickle.dumps(checkpoint, pickle.HIGHEST_PROTOCOL))
+
+def start_checkpoint_bound(checkpoint, lg2_bound, prop_dict, split_list):
+	"""
+	Starts lg2_bound in checkpoint with the property dictionary of the top of 
+	the graph and the subtree roots in split_list, unless the checkpoint was 
+	already working on lg2_bound.  Returns (prop_dict, split_list, done_set) to 
+	carry on with.  prop_dict is checkpoint['props'] so merging into it in place 
+	keeps the checkpoint up to date, but the finished roots must be appended 
+	to checkpoint['done'].
+	"""
+	if checkpoint['lg2_bound'] == lg2_bound:
+		print "Resuming %d bits from the checkpoint with %d of %d subtrees done"%(lg2_bound, len(checkpoint['done']), len(checkpoint['roots']))
+	else:
+		checkpoint['lg2_bound'] = lg2_bound
+		checkpoint['props'] = prop_dict
+		checkpoint['roots'] = split_list
+		checkpoint['done'] = []
+	return checkpoint['props'], checkpoint['roots'], set(checkpoint['done'])
+
+def finish_checkpoint_bound(checkpoint, lg2_bound, prop_dict):
+	"""
+	Moves lg2_bound to the finished bounds of checkpoint.
+	"""
+	checkpoint['finished'][lg2_bound] = prop_dict
+	checkpoint['lg2_bound'] = None
+	checkpoint['props'] = None
+	checkpoint['roots'] = []
+	checkpoint['done'] = []
+
+
+
+#################################
+#
+# On disk cache of the property dictionaries 
+# of subtrees so reruns don't walk them again.
+#
+#################################	
+
+CACHE_MAX_BYTES = 2**30		#The cache throws out the least recently used subtrees past this.
+CACHE_MIN_SIZE = 2**12		#Subtrees smaller than this (see SubtreeCostModel) are quicker to walk than to cache.
+
+class SubtreeCache(object):
+	"""
+	Directory of the property dictionaries of subtrees, one file per 
+	(root, lg2_bound) named root_lg2bound.props holding the to_bytes of the 
+	PropCounter.  The subtree of a root under a bound never changes so 
+	anything in the cache is good forever.
+	
+	Reading an entry touches its file so the modification times give the 
+	order the entries were last used in.  When the files add up to more than 
+	max_bytes the least recently used ones are deleted until they are 10% 
+	under.  Several processes can share a cache:  entries are written with 
+	write_file_atomically and an entry deleted by someone else is just a miss.
+	"""
+	
+	def __init__(self, cache_dir, max_bytes=CACHE_MAX_BYTES):
+		self.cache_dir = cache_dir
+		self.max_bytes = max_bytes
+		if not os.path.isdir(cache_dir):
+			try:
+				os.makedirs(cache_dir)
+			except OSError:		#Someone else just made it.
+				pass
+		self.num_bytes = sum([size for name, size, mtime in self.list_entries()])
+	
+	def get_file_name(self, root, lg2_bound):
+		return os.path.join(self.cache_dir, '%d_%d.props'%(root, lg2_bound))
+	
+	def list_entries(self):
+		"""
+		Returns a list of (file name, bytes, modification time) of the entries.
+		"""
+		entry_list = []
+		for name in os.listdir(self.cache_dir):
+			if name.endswith('.props'):
+				try:
+					stat = os.stat(os.path.join(self.cache_dir, name))
+				except OSError:
+					continue
+				entry_list.append((name, stat.st_size, stat.st_mtime))
+		return entry_list
+	
+	def get(self, root, lg2_bound):
+		"""
+		Returns the PropCounter of the subtree of root under 2**lg2_bound or 
+		None if it isn't in the cache.
+		"""
+		file_name = self.get_file_name(root, lg2_bound)
+		try:
+			cache_file = open(file_name, "rb")
+			try:
+				data = cache_file.read()
+			finally:
+				cache_file.close()
+			os.utime(file_name, None)
+		except (IOError, OSError):
+			return None
+		return prop_counter_from_bytes(data)
+	
+	def put(self, root, lg2_bound, prop_dict):
+		"""
+		Saves prop_dict as the PropCounter of the subtree of root under 
+		2**lg2_bound, making room if the cache is full.
+		"""
+		data = prop_dict.to_bytes()
+		write_file_atomically(self.get_file_name(root, lg2_bound), data)
+		self.num_bytes = self.num_bytes + len(data)
+		if self.num_bytes > self.max_bytes:
+			self.evict()
+	
+	def evict(self):
+		"""
+		Deletes the least recently used entries until the cache is 10% under 
+		max_bytes.
+		"""
+		entry_list = self.list_entries()
+		entry_list.sort(key=lambda entry: entry[2])
+		self.num_bytes = sum([size for name, size, mtime in entry_list])
+		for name, size, mtime in entry_list:
+			if self.num_bytes <= 0.9*self.max_bytes:
+				break
+			try:
+				os.remove(os.path.join(self.cache_dir, name))
+			except OSError:
+				pass
+			self.num_bytes = self.num_bytes - size
+
+def get_node_list_props_cached(start_list, lg2_bound, cache, depth_first=False, cancel_check=None):
+	"""
+	Same as get_node_list_props_from_list but takes the subtrees that are in 
+	cache (a SubtreeCache or None for no cache) from there and saves the ones 
+	it walks that are at least CACHE_MIN_SIZE.
+	"""
+	if cache is None:
+		return get_node_list_props_from_list(start_list, lg2_bound, depth_first, cancel_check)
+	
+	prop_dict = PropCounter()
+	for start_num in start_list:
+		sub_prop_dict = cache.get(start_num, lg2_bound)
+		if sub_prop_dict is None:
+			sub_prop_dict = get_node_list_props_from_list([start_num], lg2_bound, depth_first, cancel_check)
+			if start_num%3 != 0 and get_subtree_size(start_num, lg2_bound) >= CACHE_MIN_SIZE:
+				cache.put(start_num, lg2_bound, sub_prop_dict)
+		prop_dict = merge_props(prop_dict, sub_prop_dict)
+	return prop_dict
+
+def merge_cached_subtrees(cache, root_list, lg2_bound, prop_dict, done_list):
+	"""
+	Merges the property dictionaries of the roots of root_list found in cache 
+	into prop_dict and appends those roots to done_list.  Returns the list of 
+	the roots that weren't in the cache.  (Nothing is in a cache of None.)
+	"""
+	if cache is None:
+		return root_list
+	
+	missing_list = []
+	for root in root_list:
+		sub_prop_dict = cache.get(root, lg2_bound)
+		if sub_prop_dict is None:
+			missing_list.append(root)
+		else:
+			merge_props(prop_dict, sub_prop_dict)
+			done_list.append(root)
+	if len(missing_list) < len(root_list):
+		print "Subtrees found in the cache: %d "%(len(root_list) - len(missing_list))
+	return missing_list
+
+
+
+
+#################################
+#
+# Serial computation of statistics for a series 
+# of bounds in terms of bit sizes.  This is also the initial
+# prototype for the cloud version.
+#
+#################################	
+
+
+PROGRESS_INTERVAL = 30.0	#Seconds between progress lines (and status file writes).
+
+class ProgressReporter(object):
+	"""
+	Keeps track of how far along the bound being worked on is and prints a 
+	progress line with an ETA at most every interval seconds.  If status_file 
+	is given the same information is saved there as JSON each time (with 
+	write_file_atomically, so a process polling it never sees half of it) 
+	with the keys
+	
+	state				'running', 'finished' (the bound) or 'done' (the run)
+	lg2_bound			the bound being worked on
+	jobs_done			subtree jobs finished
+	jobs_total			subtree jobs in the bound
+	fraction			fraction of the bound's predicted cost that is done
+	elapsed_seconds		wall clock seconds since the bound started
+	eta_seconds			predicted seconds left (None until something is done)
+	estimated_nodes		predicted number of nodes in the bound's graph
+	estimated_nodes_done	estimated_nodes times fraction
+	pid, time			who wrote it and when
+	
+	The jobs are given with their predicted costs (see SubtreeCostModel) so 
+	a few heavy jobs count for more than many light ones.  The number of 
+	nodes is predicted from the last two bounds' counts:  the last count 
+	times their ratio (or just doubled if there's only one).
+	"""
+	
+	def __init__(self, status_file=None, interval=PROGRESS_INTERVAL):
+		self.status_file = status_file
+		self.interval = interval
+		self.bound_counts = {}		#Number of nodes by finished bound.
+		self.lg2_bound = None
+		self.job_costs = {}
+		self.done_set = set()
+		self.total_cost = 0.0
+		self.done_cost = 0.0
+		self.start_time = time.time()
+		self.report_time = 0.0
+	
+	def start_bound(self, lg2_bound, job_costs):
+		"""
+		Starts keeping track of lg2_bound whose jobs are the keys of the 
+		dictionary job_costs and whose values are their predicted costs.
+		"""
+		self.lg2_bound = lg2_bound
+		self.job_costs = dict(job_costs)
+		self.done_set = set()
+		self.total_cost = sum(self.job_costs.values())
+		self.done_cost = 0.0
+		self.start_time = time.time()
+		self.report_time = time.time()
+	
+	def job_done(self, key):
+		if key in self.job_costs and key not in self.done_set:
+			self.done_set.add(key)
+			self.done_cost = self.done_cost + self.job_costs[key]
+		self.tick()
+	
+	def tick(self):
+		"""
+		Reports if interval has gone by since the last report.  The drivers 
+		call this whenever they wake up waiting on jobs, so there's a progress 
+		line even while every job out is a long one.
+		"""
+		if self.lg2_bound is not None and time.time() - self.report_time > self.interval:
+			self.report()
+	
+	def split_job(self, key, child_costs):
+		"""
+		Replaces the job key with the jobs in the dictionary child_costs (see 
+		local_graph_stats_nograph).
+		"""
+		self.total_cost = self.total_cost - self.job_costs.pop(key, 0.0) + sum(child_costs.values())
+		self.job_costs.update(child_costs)
+	
+	def finish_bound(self, lg2_bound, count):
+		"""
+		Notes that lg2_bound is finished with count nodes.
+		"""
+		self.bound_counts[lg2_bound] = count
+		if lg2_bound != self.lg2_bound:		#It had no jobs.
+			self.start_bound(lg2_bound, {})
+		self.done_set = set(self.job_costs.keys())
+		self.done_cost = self.total_cost
+		self.report('finished')
+	
+	def get_estimated_nodes(self, lg2_bound):
+		"""
+		Returns the predicted number of nodes for lg2_bound (None without a 
+		count for the bound before it), or the count once it's finished.
+		"""
+		if lg2_bound in self.bound_counts:
+			return float(self.bound_counts[lg2_bound])
+		if lg2_bound - 1 not in self.bound_counts:
+			return None
+		last_count = self.bound_counts[lg2_bound - 1]
+		if lg2_bound - 2 in self.bound_counts:
+			return last_count*last_count/float(self.bound_counts[lg2_bound - 2])
+		return 2.0*last_count
+	
+	def get_status(self, state='running'):
+		elapsed = time.time() - self.start_time
+		if self.total_cost > 0:
+			fraction = self.done_cost/self.total_cost
+		else:
+			fraction = 1.0
+		eta = None
+		if fraction > 0:
+			eta = elapsed*(1.0 - fraction)/fraction
+		estimated_nodes = self.get_estimated_nodes(self.lg2_bound)
+		estimated_nodes_done = None
+		if estimated_nodes is not None:
+			estimated_nodes_done = estimated_nodes*fraction
+		return {'state': state, 'lg2_bound': self.lg2_bound, 'jobs_done': len(self.done_set), 'jobs_total': len(self.job_costs), 
+			'fraction': fraction, 'elapsed_seconds': elapsed, 'eta_seconds': eta, 'estimated_nodes': estimated_nodes, 
+			'estimated_nodes_done': estimated_nodes_done, 'pid': os.getpid(), 'time': time.time()}
+	
+	def report(self, state='running'):
+		"""
+		Prints the progress line and saves the status file.
+		"""
+		self.report_time = time.time()
+		status = self.get_status(state)
+		if state == 'running':
+			line = "Progress %d bits: %d of %d jobs, %.1f%% of the predicted cost, %.0f seconds so far"%(self.lg2_bound, 
+				status['jobs_done'], status['jobs_total'], 100.0*status['fraction'], status['elapsed_seconds'])
+			if status['eta_seconds'] is not None:
+				line = line + ", about %.0f seconds left"%(status['eta_seconds'])
+			if status['estimated_nodes'] is not None:
+				line = line + ", about %.4g of %.4g nodes"%(status['estimated_nodes_done'], status['estimated_nodes'])
+			print line
+		
+		if self.status_file is not None:
+			write_file_atomically(self.status_file, json.dumps(status, sort_keys=True))
+
+
+TIME_BUDGET_MARGIN = 1.2	#A bound is only started if this times its predicted time fits in what's left of the time budget.
+
+class TimeBudget(object):
+	"""
+	Decides whether the next bound of a run fits in a wall clock budget of 
+	seconds (counted from when the TimeBudget is made).  A budget of None 
+	never runs out.
+	
+	The time of a bound is fit to the doubling model 
+	
+		time = overhead + rate*2**bound
+		
+	by least squares over the measured bounds (so the biggest bounds count the 
+	most).  Until there are two bounds, or if the fit comes out without a 
+	positive rate, the last bound's time is just doubled for each bit.
+	"""
+	
+	def __init__(self, seconds=None):
+		self.seconds = seconds
+		self.start_time = time.time()
+		self.bound_times = {}		#Measured wall clock seconds by bound.
+	
+	def observe(self, lg2_bound, seconds):
+		self.bound_times[lg2_bound] = seconds
+	
+	def predict(self, lg2_bound):
+		"""
+		Returns the predicted seconds for lg2_bound (0 with nothing measured).
+		"""
+		if not self.bound_times:
+			return 0.0
+		last_bound = max(self.bound_times.keys())
+		last_time = self.bound_times[last_bound]
+		
+		n = len(self.bound_times)
+		x_list = [2.0**b for b in self.bound_times.keys()]
+		t_list = self.bound_times.values()
+		x_mean = sum(x_list)/n
+		t_mean = sum(t_list)/n
+		x_var = sum([(x - x_mean)**2 for x in x_list])
+		if x_var > 0:
+			rate = sum([(x - x_mean)*(t - t_mean) for x, t in zip(x_list, t_list)])/x_var
+			overhead = max(t_mean - rate*x_mean, 0.0)
+			if rate > 0:
+				return overhead + rate*2.0**lg2_bound
+		return last_time*2.0**(lg2_bound - last_bound)
+	
+	def get_remaining(self):
+		return self.seconds - (time.time() - self.start_time)
+	
+	def allows(self, lg2_bound):
+		"""
+		Returns True if lg2_bound is predicted to finish inside the budget.
+		"""
+		if self.seconds is None:
+			return True
+		return TIME_BUDGET_MARGIN*self.predict(lg2_bound) <= self.get_remaining()
+	
+	def get_stop_note(self, lg2_bound, max_lg2_bound):
+		"""
+		Returns the note for the end of the report when the run stops before 
+		lg2_bound.
+		"""
+		return "STOPPED BEFORE THE %d BIT BOUND (OF %d):  predicted %.1f seconds, %.1f seconds left of the %.1f second time budget \n\n"%(lg2_bound, max_lg2_bound, self.predict(lg2_bound), self.get_remaining(), self.seconds)
+
+
+class StatsRun(object):
+	"""
+	The bookkeeping that the graph_stats_nograph drivers share for the bounds 
+	of a run:  the report in graph_stats.txt, the records, the checkpoint, 
+	the time budget, the progress and the cache.  The keyword arguments are 
+	the run options the drivers pass through, and they work as described in 
+	graph_stats_nograph.  Each driver goes
+	
+		run = StatsRun(start_num, max_lg2_bound, **run_options)
+		for i in range(min_lg2_bound, max_lg2_bound+1):
+			prop_dict = run.start_bound(i)
+			if prop_dict is not None:
+				pass
+			elif run.out_of_time(i):
+				break
+			else:
+				(count the bound, calling run.save() when run.checkpoint_due())
+				run.finish_bound(i, prop_dict)
+			run.report_bound(i, prop_dict)
+		run.close()
+	"""
+	
+	def __init__(self, start_num, max_lg2_bound, checkpoint_file=None, cache_dir=None, time_budget=None, records_file=STATS_RECORDS_FILE, progress_file=None):
+		self.start_num = start_num
+		self.max_lg2_bound = max_lg2_bound
+		self.checkpoint_file = checkpoint_file
+		self.cache_dir = cache_dir
+		self.records_file = records_file
+		self.stats_file = open('graph_stats.txt',"w")
+		self.prev_count = 1
+		self.checkpoint = load_checkpoint(checkpoint_file, start_num)
+		self.budget = TimeBudget(time_budget)
+		self.progress = ProgressReporter(progress_file)
+		self.cache = None
+		if cache_dir is not None:
+			self.cache = SubtreeCache(cache_dir)
+		self.start_time = time.time()
+		self.start_clock = time.clock()
+		self.save_time = self.start_time
+	
+	def start_bound(self, lg2_bound):
+		"""
+		Starts the clocks for lg2_bound.  Returns its property dictionary if 
+		the checkpoint has the bound finished and otherwise None.
+		"""
+		self.start_time = time.time()
+		self.start_clock = time.clock()
+		self.save_time = self.start_time
+		return self.checkpoint['finished'].get(lg2_bound)
+	
+	def out_of_time(self, lg2_bound):
+		"""
+		Returns True if lg2_bound doesn't fit in what's left of the time 
+		budget, after printing the note and adding it to the report.
+		"""
+		if self.budget.allows(lg2_bound):
+			return False
+		note = self.budget.get_stop_note(lg2_bound, self.max_lg2_bound)
+		print note
+		self.stats_file.write(note)
+		return True
+	
+	def checkpoint_due(self):
+		return time.time() - self.save_time > CHECKPOINT_INTERVAL
+	
+	def save(self, checkpoint=None):
+		"""
+		Saves checkpoint (the run's own if it's None) to the checkpoint file.
+		"""
+		if checkpoint is None:
+			checkpoint = self.checkpoint
+		save_checkpoint(self.checkpoint_file, checkpoint)
+		self.save_time = time.time()
+	
+	def finish_bound(self, lg2_bound, prop_dict):
+		"""
+		Saves prop_dict as the counts of the finished lg2_bound in the 
+		checkpoint and gives the time the bound took to the budget.
+		"""
+		finish_checkpoint_bound(self.checkpoint, lg2_bound, prop_dict)
+		self.save()
+		self.budget.observe(lg2_bound, time.time() - self.start_time)
+	
+	def report_bound(self, lg2_bound, prop_dict, print_times=False):
+		"""
+		Writes the statistics of lg2_bound to the report and the records (see 
+		write_bound_stats) and, if print_times is True, prints the times.
+		"""
+		prop_time = time.time()
+		prop_clock = time.clock()
+		
+		#Output the property dictionary data to log file.
+		cur_count = write_bound_stats(self.stats_file, self.records_file, self.start_num, lg2_bound, prop_dict, self.prev_count, prop_time - self.start_time, prop_clock - self.start_clock)
+		self.progress.finish_bound(lg2_bound, cur_count)
+		
+		self.prev_count = cur_count
+		
+		if print_times:
+			stat_time = time.time()
+			stat_clock = time.clock()
+			
+			#Note the CPU time is only the CPU time of this process and not the cloud's or the workers'.
+			print "%30s %12s %12s"%(' ','CPU TIME', 'WALL TIME')
+			print "%30s %12.6f %12.6f "%('Computing prop_dict', prop_clock - self.start_clock, prop_time - self.start_time)
+			print "%30s %12.6f %12.6f "%('Outputing statistics', stat_clock - prop_clock, stat_time - prop_time)
+			print "%30s %12.6f %12.6f \n"%('Totals', stat_clock - self.start_clock, stat_time - self.start_time)
+	
+	def close(self):
+		self.stats_file.close()
+		self.progress.report('done')
+
+
+def graph_stats_nograph(start_num, min_lg2_bound, max_lg2_bound, depth_first=False, sweep=False, **run_options):
+	"""
+	This function writes the statistics for the graphs without 
+	creating the graphs.  The entire purpose is to 
+	deal with the fact that at the bound of 15 or 16 
+	pydot becomes unweildy.
+	
+	If depth_first is True the subtrees are walked depth first so the memory 
+	needed stays small no matter how big the bound is.
+	
+	If sweep is True the graph is walked just once, at max_lg2_bound, with 
+	get_node_list_props_sweep which counts every node for all of the bounds it 
+	belongs to.  So the whole report costs about as much as the biggest bound.
+	
+	The keyword arguments in run_options go to StatsRun, which keeps the 
+	books for every bound:
+	
+	If checkpoint_file is given the finished bounds and the subtrees done so 
+	far are saved there every CHECKPOINT_INTERVAL seconds and after every bound 
+	(see load_checkpoint).  Running again with the same checkpoint_file skips 
+	everything that was saved.  (Sweeps aren't checkpointed.)
+	
+	If cache_dir is given the subtrees are looked up in and saved to the 
+	SubtreeCache there so they only ever get walked once.  (Sweeps don't use it.)
+	
+	If time_budget is given (in seconds) a bound is only started if it's 
+	predicted to finish inside the budget (see TimeBudget).  Otherwise the run 
+	stops there with a note at the end of graph_stats.txt and the bounds done 
+	so far reported as usual.  (Sweeps ignore it.)
+	
+	The record of every bound (see get_stats_record) is appended to 
+	records_file, unless it's None, and the report is written from the 
+	record.  render_stats_records remakes the report from the records.
+	
+	Progress through each bound is printed every PROGRESS_INTERVAL seconds 
+	and saved to progress_file, if it's given, for other processes to poll 
+	(see ProgressReporter).
+
+	"""
+
+	run = StatsRun(start_num, max_lg2_bound, **run_options)
+	checkpoint = run.checkpoint
+	
+	if sweep:
+		sweep_dict = get_node_list_props_sweep([start_num], min_lg2_bound, max_lg2_bound)
+	
+	for i in range(min_lg2_bound, max_lg2_bound+1):
+	
+		prop_dict = run.start_bound(i)
+		
+		if sweep:
+			prop_dict = sweep_dict[i]
+		elif prop_dict is not None:		#Finished in the checkpoint.
+			pass
+		elif run.out_of_time(i):
+			break
+		else:
+			#Initialization of property dictionary
+			prop_dict = PropCounter()
+			
+			#Get the property dictionary data
+			#####
+			# Section A
+			#####
+		
+			### Do the initial levels
+			bound = 2**i
+			cur_level = [start_num]
+			for level in range(2):  #TUNE THIS BOUND FOR PARALLELISM  
+				prop_dict.add_list(cur_level)
+				next_level = []
+				for target in cur_level:
+					next_level.extend(compute_up_level_bounded(target, bound))
+				cur_level = next_level
+		
+			###Split the list (which is cur_level).  
+			add_list = [x for x in cur_level if x%3 == 0]
+			split_list = [x for x in cur_level if x%3 != 0]
+			print "Subtree count: %d "%(len(split_list))
+		
+			###Add the mod3 = 0 class to prop_dict. 
+			prop_dict.add_list(add_list)
+			prop_dict, split_list, done_set = start_checkpoint_bound(checkpoint, i, prop_dict, split_list)
+		
+			###  Send the rest of the list out as 'separate jobs'
+			### Merge the separate jobs back into the property list.
+			run.progress.start_bound(i, dict([(x, get_subtree_size(x, i)) for x in split_list if x not in done_set]))
+			for sub_start_num in split_list:
+				if sub_start_num in done_set:
+					continue
+				sub_prop_dict = get_node_list_props_cached([sub_start_num],i,run.cache,depth_first)
+				prop_dict = merge_props(prop_dict,sub_prop_dict)
+				checkpoint['done'].append(sub_start_num)
+				run.progress.job_done(sub_start_num)
+				if run.checkpoint_due():
+					run.save()
+			
+			run.finish_bound(i, prop_dict)
+		
+			#####
+			# End Section A
+			#####
 		"""
 		#The code in Section A can be entirely replaced by this command if running in serial.
 		prop_dict = get_node_list_props(start_num, i)		
 		"""
 		
 		
-		#Output the property dictionary data to log file.
-		prop_keys = prop_dict.keys()
-		cur_count = sum(prop_dict.values())
+		run.report_bound(i, prop_dict)
+
+	run.close()
+
+	return 'done'
+
+
+def save_props(file_name, prop_dict):
+	"""
+	Writes prop_dict to file_name (see write_file_atomically).
+	"""
+	write_file_atomically(file_name, prop_dict.to_bytes())
+
+def load_props(file_name):
+	"""
+	Reads back a property dictionary written by save_props.
+	"""
+	props_file = open(file_name, "rb")
+	prop_dict = prop_counter_from_bytes(props_file.read())
+	props_file.close()
+	return prop_dict
+
+def incremental_graph_stats_nograph(start_num, min_lg2_bound, max_lg2_bound, frontier_dir='frontiers', records_file=STATS_RECORDS_FILE):
+	"""
+	This function writes the same statistics as graph_stats_nograph but 
+	saves the frontier of every bound it finishes in frontier_dir:  the 
+	property dictionary and the boundary (see add_chains_to_props) of the graph.
+	
+	The bound i graph is the bound i-1 graph plus everything on or above 
+	its boundary.  So when the frontier for bound i-1 is there only the new 
+	part of the bound i graph gets walked, and a bound whose own frontier is 
+	there isn't walked at all.  Pushing a finished 2^33 run to 2^34 is just 
+	running this again with max_lg2_bound = 34.
+	
+	Warning:  A boundary file has about one line for every node in the graph 
+	not divisible by 3, so it takes a lot of disk at big bounds.
+	
+	records_file works as in graph_stats_nograph.
+	"""
+	if not os.path.isdir(frontier_dir):
+		os.makedirs(frontier_dir)
+	
+	stats_file = open('graph_stats.txt',"w")
+	prev_count = 1
+	
+	for i in range(min_lg2_bound, max_lg2_bound+1):
+		frontier_name = os.path.join(frontier_dir, "frontier%d_%d"%(start_num, i))
+		prev_frontier_name = os.path.join(frontier_dir, "frontier%d_%d"%(start_num, i-1))
+		start_time = time.time()
+		start_clock = time.clock()
 		
-		print "%d nodes = %.2f bits of nodes for %d bits \n"%(cur_count,math.log(cur_count,2),i)
-				
-		#Now it's time to assemble some statistics
-		write_str = "%3d BIT BOUND: \n \n"%(i)
-		stats_file.write(write_str)
-		write_str = "\t Number of nodes: %22d  %20.2f bits\n"%(cur_count, math.log(cur_count,2))
-		stats_file.write(write_str)
-		write_str = "\t Number of previously seen nodes: %6d  %20.2f bits\n"%(prev_count,math.log(prev_count ,2))
-		stats_file.write(write_str)
-		write_str = "\t Number of new nodes: %18d  %20.2f bits\n"%(cur_count-prev_count,math.log(cur_count-prev_count ,2))
-		stats_file.write(write_str)
-		write_str = "\t Percentage of new nodes: %14.2f \n"%(1.0*(cur_count-prev_count)/cur_count)
-		stats_file.write(write_str)
-	
-		
-		#Put together # of things in each congruence class
-		class0_count = sum([prop_dict[x] for x in prop_keys if x[0] == 0])
-		class1_count = sum([prop_dict[x] for x in prop_keys if x[0] == 1])
-		class2_count = sum([prop_dict[x] for x in prop_keys if x[0] == 2])
-	
-		stats_file.write("\n")
-		stats_file.write("\t NUMBER OF NODES IN CONGRUENCE CLASSES MODULO 3 \n\n")
-		stats_file.write("\t \t 0 \t %8d \n"%(class0_count))
-		stats_file.write("\t \t 1 \t %8d \n"%(class1_count))
-		stats_file.write("\t \t 2 \t %8d \n"%(class2_count))
-		
-		#Put together # of things with even/odd descendents by congruence class
-		
-		class1_even_count = sum([prop_dict[x] for x in prop_keys if x[0] == 1 and x[3] == 0])
-		class1_odd_count = sum([prop_dict[x] for x in prop_keys if x[0] == 1 and x[3] == 1])
-		class2_even_count = sum([prop_dict[x] for x in prop_keys if x[0] == 2 and x[3] == 0])
-		class2_odd_count = sum([prop_dict[x] for x in prop_keys if x[0] == 2 and x[3] == 1])
-		
-		stats_file.write("\n")
-		stats_file.write("\t NUMBER OF NODES WITH EVEN/ODD DECENDANTS \n\n")
-		stats_file.write("\t %8s \t %8s \t %8s \t %8s \n "%('PARITY', 'COUNT', '1COUNT', '2COUNT'))
-		stats_file.write("\t %8s \t %8d \t %8d \t %8d \n "%('EVEN', class1_even_count + class2_even_count,class1_even_count,class2_even_count))
-		stats_file.write("\t %8s \t %8d \t %8d \t %8d \n "%('ODD', class1_odd_count + class2_odd_count,class1_odd_count,class2_odd_count))
-		
-		stats_file.write("\n")
-		stats_file.write("\t BREAKDOWN OF NODES\n\n")
-		w_str = create_stats_table(prop_dict)
-		stats_file.write(w_str)
-		
-		stats_file.write("\n")
-		stats_file.write("\t NUMBER OF NODES OF A GIVEN LENGTH \n\n")
-		stats_file.write("\t %8s \t %8s \t %8s \t %8s \t %8s \t %8s \t %8s \n"%('LENGTH','ACT. NODES','MAX POSS.', '% OF POSS.', '#0 MOD3','#1 MOD3','#2 MOD3'))
-		for j in range(i):
-			num_of_length0 = sum([prop_dict[x] for x in prop_keys if x[1] == j and x[0] == 0])
-			num_of_length1 = sum([prop_dict[x] for x in prop_keys if x[1] == j and x[0] == 1])
-			num_of_length2 = sum([prop_dict[x] for x in prop_keys if x[1] == j and x[0] == 2])
-			num_of_length = num_of_length0 + num_of_length1 + num_of_length2
+		if os.path.exists(frontier_name + '.props'):
+			print "Using the saved frontier for %d bits"%(i)
+			prop_dict = load_props(frontier_name + '.props')
+		else:
+			boundary_file = open(frontier_name + '.boundary.tmp', "w")
+			if os.path.exists(prev_frontier_name + '.props'):
+				print "Extending the saved frontier for %d bits"%(i-1)
+				prop_dict = load_props(prev_frontier_name + '.props')
+				add_chains_to_props(read_boundary_file(prev_frontier_name + '.boundary'), i, prop_dict, boundary_file)
+			else:
+				prop_dict = get_node_list_props_boundary([start_num], i, boundary_file)
+			boundary_file.close()
 			
-			max_poss = max_poss_of_length(j)
-			stats_file.write("\t \t %d \t %8d \t %8d \t %3.5f \t %8d \t %8d \t %8d\n"%(j,num_of_length,max_poss,1.0*num_of_length/max_poss, num_of_length0, num_of_length1,num_of_length2))
+			#The props file goes last since it marks the frontier as finished.
+			os.rename(frontier_name + '.boundary.tmp', frontier_name + '.boundary')
+			save_props(frontier_name + '.props', prop_dict)
+		
+		#Output the property dictionary data to log file.
+		cur_count = write_bound_stats(stats_file, records_file, start_num, i, prop_dict, prev_count, time.time() - start_time, time.clock() - start_clock)
+		
+		prev_count = cur_count
+
+	stats_file.close()
+
+	return 'done'
+
+#################################
+#
+# Monte Carlo estimates of the statistics for 
+# bounds too big to walk the whole graph.
+#
+#################################	
 
-		stats_file.write("\n")
-		
-		prev_count = cur_count
+MONTE_CARLO_TOP_ROOTS = 2**10		#Number of subtree roots the exactly counted top of the graph is cut into.
+CONFIDENCE_Z = 1.96					#Confidence intervals are 95%.
+
+def get_estimate_stats(lg2_bound):
+	"""
+	Returns the list of (name, cells) of the statistics estimated by 
+	estimate_graph_stats_nograph where cells are the indices of the counts of 
+	a PropCounter (see PropCounter) that add up to the statistic.
+	"""
+	num_lengths = lg2_bound + 1
+	stat_list = [('nodes', range(9*num_lengths))]
+	for class_mod3 in range(3):
+		stat_list.append(('class %d'%(class_mod3), [9*j + 3*class_mod3 + color + 1 for j in range(num_lengths) for color in range(-1,2)]))
+	for class_mod3 in range(1,3):
+		for parity in range(2):
+			stat_list.append(('class %d parity %d'%(class_mod3, parity), [9*j + 3*class_mod3 + color + 1 for j in range(num_lengths) for color in range(-1,2) if get_parity_from_data(class_mod3, j, color) == parity]))
+	for j in range(num_lengths):
+		for class_mod3 in range(3):
+			stat_list.append(('length %d class %d'%(j, class_mod3), [9*j + 3*class_mod3 + color + 1 for color in range(-1,2)]))
+	return stat_list
+
+def sample_probe_cells(root_list, lg2_bound, rand):
+	"""
+	Runs one random probe of the graph above the nodes of root_list and returns 
+	a dictionary whose keys are the PropCounter indices of the nodes it visited 
+	and whose values are their weights.  The total weight of any set of 
+	indices is an unbiased estimate of the number of nodes above root_list 
+	(root_list included) with those indices.
+	
+	This is Chen's stratified version of Knuth's random path estimator.  The 
+	walk goes a level at a time and the nodes of each level are sorted into 
+	strata by (class mod 3, color, bits left under the bound), nodes in the 
+	same stratum having about the same subtrees.  (The roots join the walk at 
+	the level of their length, which doesn't matter to the estimate.)  Only 
+	one node per stratum is kept, picked at random with probability 
+	proportional to the weights of the nodes in the stratum, and it gets 
+	their total weight.  A plain random path picks one child at a time and is 
+	hopeless here:  most paths die out quickly and the few that don't carry 
+	huge weights.  With no roots there is nothing to probe and the 
+	dictionary is empty.
+	"""
+	bound = 2**lg2_bound
+	root_dict = {}
+	for root in root_list:
+		root_dict.setdefault(get_length(root), []).append(root)
+	
+	cell_dict = {}
+	if not root_dict:
+		return cell_dict
+	level = min(root_dict.keys())
+	cur_level = {}
+	while cur_level or level <= max(root_dict.keys()):
+		next_level = {}
+		weighted_list = cur_level.values() + [(root, 1.0) for root in root_dict.get(level, [])]
+		for n, weight in weighted_list:
+			class_mod3, length, color, parity = get_data(n)
+			index = 9*length + 3*class_mod3 + color + 1
+			cell_dict[index] = cell_dict.get(index, 0.0) + weight
+			for child in compute_up_level_bounded(n, bound):
+				stratum = (child%3, get_data(child)[2], lg2_bound - child.bit_length())
+				if stratum in next_level:
+					kept, total_weight = next_level[stratum]
+					total_weight = total_weight + weight
+					if rand.random()*total_weight < weight:
+						kept = child
+					next_level[stratum] = (kept, total_weight)
+				else:
+					next_level[stratum] = (child, weight)
+		cur_level = next_level
+		level = level + 1
+	return cell_dict
+
+def estimate_graph_stats_nograph(start_num, lg2_bound, num_samples, seed=None):
+	"""
+	Estimates the statistics of the lg2_bound bit bounded graph through 
+	start_num from num_samples random probes (see sample_probe_cells), so the 
+	cost is set by num_samples instead of doubling with the bound.  Writes the 
+	estimates with their confidence intervals to graph_estimate.txt and returns 
+	a dictionary {name: (estimate, half width of the interval)} with the names 
+	from get_estimate_stats.
+	
+	The top of the graph is counted exactly, cut into about 
+	MONTE_CARLO_TOP_ROOTS subtree roots by get_auto_farm_split, and only the 
+	subtrees of the roots are probed.  The probes are independent unbiased 
+	estimates so the intervals are CONFIDENCE_Z standard errors of their mean 
+	on either side.  For small bounds the top is the whole graph, and then 
+	the exact counts come back with intervals of width zero.
+	"""
+	rand = random.Random(seed)
+	stat_list = get_estimate_stats(lg2_bound)
+	
+	top_dict, root_list = get_auto_farm_split(start_num, lg2_bound, MONTE_CARLO_TOP_ROOTS, SubtreeCostModel())
+	top_dict.grow(lg2_bound + 1)
+	sum_list = [0.0]*len(stat_list)
+	square_sum_list = [0.0]*len(stat_list)
+	for sample in range(num_samples):
+		cell_dict = sample_probe_cells(root_list, lg2_bound, rand)
+		for k, (name, cells) in enumerate(stat_list):
+			x = sum([cell_dict.get(index, 0.0) for index in cells])
+			sum_list[k] = sum_list[k] + x
+			square_sum_list[k] = square_sum_list[k] + x*x
+	
+	estimate_dict = {}
+	for k, (name, cells) in enumerate(stat_list):
+		mean = sum_list[k]/num_samples
+		if num_samples > 1:
+			variance = max(square_sum_list[k] - num_samples*mean**2, 0.0)/(num_samples - 1)
+		else:
+			variance = 0.0
+		exact = sum([top_dict.counts[index] for index in cells])
+		estimate_dict[name] = (exact + mean, CONFIDENCE_Z*math.sqrt(variance/num_samples))
+	
+	write_graph_estimate(lg2_bound, estimate_dict, num_samples, len(root_list), sum(top_dict.counts))
+	return estimate_dict
 
+def write_graph_estimate(lg2_bound, estimate_dict, num_samples, num_roots, top_count):
+	"""
+	Writes the estimates from estimate_graph_stats_nograph to 
+	graph_estimate.txt in the layout of write_graph_stats.
+	"""
+	stats_file = open('graph_estimate.txt',"w")
+	nodes, nodes_error = estimate_dict['nodes']
+	
+	print "%.4g +- %.2g nodes = %.2f bits of nodes for %d bits \n"%(nodes, nodes_error, math.log(nodes,2), lg2_bound)
+	
+	stats_file.write("%3d BIT BOUND ESTIMATE: \n \n"%(lg2_bound))
+	stats_file.write("\t %d nodes counted exactly, %d probes of %d subtrees, intervals are %.2f standard errors \n\n"%(top_count, num_samples, num_roots, CONFIDENCE_Z))
+	stats_file.write("\t Number of nodes: %22.6g +- %12.3g  %8.2f bits\n"%(nodes, nodes_error, math.log(nodes,2)))
+	
+	stats_file.write("\n")
+	stats_file.write("\t NUMBER OF NODES IN CONGRUENCE CLASSES MODULO 3 \n\n")
+	for class_mod3 in range(3):
+		stats_file.write("\t \t %d \t %12.6g +- %12.3g \n"%((class_mod3,) + estimate_dict['class %d'%(class_mod3)]))
+	
+	stats_file.write("\n")
+	stats_file.write("\t NUMBER OF NODES WITH EVEN/ODD DECENDANTS \n\n")
+	stats_file.write("\t %8s \t %28s \t %28s \n"%('PARITY', '1COUNT', '2COUNT'))
+	for parity, parity_name in ((0, 'EVEN'), (1, 'ODD')):
+		stats_file.write("\t %8s \t %12.6g +- %12.3g \t %12.6g +- %12.3g \n"%((parity_name,) + estimate_dict['class 1 parity %d'%(parity)] + estimate_dict['class 2 parity %d'%(parity)]))
+	
+	stats_file.write("\n")
+	stats_file.write("\t NUMBER OF NODES OF A GIVEN LENGTH \n\n")
+	stats_file.write("\t %8s \t %28s \t %28s \t %28s \n"%('LENGTH', '#0 MOD3', '#1 MOD3', '#2 MOD3'))
+	for j in range(lg2_bound):
+		stats_file.write("\t \t %d \t %12.6g +- %12.3g \t %12.6g +- %12.3g \t %12.6g +- %12.3g\n"%((j,) + estimate_dict['length %d class 0'%(j)] + estimate_dict['length %d class 1'%(j)] + estimate_dict['length %d class 2'%(j)]))
+	stats_file.write("\n")
 	stats_file.close()
 
-	return 'done'
+
 
 #############################################
 #
@@ -565,20 +2302,67 @@ def graph_stats_nograph(start_num, min_lg2_bound, max_lg2_bound):
 #############################################
 
 
-import cloud 
+try:
+	import cloud 
+except ImportError:		#PiCloud is gone.  Only the local version below can run without it.
+	cloud = None
 
 #chromebox Hardware contraints 
 NUM_CORES = 32		#MUST BE > 0!!! No cores, no computation.
-MAX_BOUND_ON_MACHINE = 32
+MEMORY_BUDGET = 4*2**30		#Bytes the jobs running at once on a machine may use together.  (Was MAX_BOUND_ON_MACHINE = 32.)
 
+FARM_BREAK_POINT = 14	#Fixed split for get_farm_split.  The drivers pick their own split with get_auto_farm_split.
 
-def cloud_call_of_get_node_list_props(data):
 
+def cloud_call_of_get_node_list_props(data):
+	"""
+	Runs get_node_list_props_from_list on data = (start_list, lg2_bound, depth_first) 
+	and returns (prop_dict, seconds), seconds being how long the walk took so 
+	the driver's SubtreeCostModel can be calibrated.
+	"""
+	job_start_time = time.time()
 	start_list = data[0]
 	lg2_bound = data[1]
+	if len(data) > 2:
+		depth_first = data[2]
+	else:
+		depth_first = False
 	
-	prop_dict = get_node_list_props_from_list(start_list,lg2_bound)
-	return prop_dict
+	prop_dict = get_node_list_props_from_list(start_list,lg2_bound,depth_first)
+	return prop_dict, time.time() - job_start_time
+
+def get_farm_split(start_num, lg2_bound, farm_break_point=FARM_BREAK_POINT):
+	"""
+	Computes the top of the bounded graph through start_num, stopping at nodes 
+	of length farm_break_point, and returns (prop_dict, split_list).  prop_dict 
+	holds the statistics for every node computed here and split_list is the 
+	sorted list of subtree roots (none congruent to 0 mod 3) still to be farmed out.
+	
+	CAVEAT NOTE: !!!!  The roots in split_list are NOT in prop_dict!!!
+	"""
+	bound = 2**lg2_bound
+	prop_dict = PropCounter()
+	cur_level = [start_num]
+	farm_list = []
+	
+	while cur_level:		#Until the subtree defined by the farm_break_point bound is completely computed.
+		prop_dict.add_list(cur_level)
+		next_level = []
+		for target in cur_level:
+			next_level.extend(compute_up_level_bounded(target, bound))
+		cur_level = [x for x in next_level if get_length(x) <farm_break_point]			
+		farm_list.extend([x for x in next_level if get_length(x) >= farm_break_point])
+	
+	cur_level.extend(farm_list)
+	###Split the list (which is cur_level).  
+	add_list = [x for x in cur_level if x%3 == 0]
+	split_list = [x for x in cur_level if x%3 != 0]
+	split_list.sort()
+	
+	###Add the mod3 = 0 class to prop_dict. 
+	prop_dict.add_list(add_list)
+	
+	return prop_dict, split_list
 	
 	
 """
@@ -615,177 +2399,1042 @@ proportional to 2**(bound - length_of_number) if the number is congruent to 1 mo
 2**(bound - length_of_number -1) if the number is congruent to 2 mod 3.  Therefore to a first approxmation
 it is enough to approximately balance the sizes.  But a more accurate balancing should balance both 
 the sizes and the numbers of 1 mod 3 versus 2 mod 3.
+
+UPDATE:  SubtreeCostModel below uses those sizes to predict the time of each job and lpt_partition 
+uses the predictions to balance the partitions.  The model also learns the actual seconds per unit 
+of size (separately for 1 mod 3 and 2 mod 3 roots) from the measured times of finished jobs.
+
+UPDATE:  The memory problem above comes from the width of the levels in the level by level walk.  
+The depth first walk (depth_first=True) only keeps the path down from the subtree root in memory 
+so with it there is no need for MAX_BOUND_ON_MACHINE and the serial parts.
+
+UPDATE:  MAX_BOUND_ON_MACHINE is replaced by MEMORY_BUDGET and MemoryScheduler below.  The peak 
+memory of each job is estimated from the sizes of its subtrees (FRONTIER_BYTES_PER_SIZE is set so 
+that the jobs at the 2^32 bound just fit in the 4 GB above) and the number of serial parts is the 
+total estimate over MEMORY_BUDGET.  That is 2 parts for 2^33 as in the example and then doubles with 
+the bound like the memory does, where (i-MAX_BOUND_ON_MACHINE + 1) only grew by one.  The local 
+version admits the jobs one at a time as their estimates fit in the budget, and scales the estimates 
+up if the workers turn out to use more memory than predicted.
+
+UPDATE:  The drivers no longer split at the fixed FARM_BREAK_POINT.  get_auto_farm_split keeps 
+splitting the subtree with the largest predicted time until there are TASKS_PER_WORKER jobs per 
+worker of about equal time, so the split follows the bound and the number of workers.
 """
 
-def picloud_graph_stats_nograph(start_num, min_lg2_bound, max_lg2_bound):
+DEFAULT_SECONDS_PER_SIZE = 1e-6	#Rough guess used until a SubtreeCostModel has seen some jobs.
+
+class SubtreeCostModel(object):
+	"""
+	Predicts how long the job for a list of subtree roots will take using 
+	the heuristic from the NOTES above.  The size of the subtree of a root is 
+	
+		2**(bound - length)		if the root is 1 mod 3
+		2**(bound - length - 1)	if the root is 2 mod 3
+		1						if the root is 0 mod 3 (it's a leaf)
+		
+	and the time is the size times the seconds per unit of size for the 
+	root's class mod 3.  The seconds per unit of size start at 
+	DEFAULT_SECONDS_PER_SIZE and are calibrated by observe from the measured 
+	times of finished jobs.
+	"""
+	
+	def __init__(self):
+		self.seconds = [0.0, 0.0, 0.0]		#Measured seconds by class mod 3.
+		self.sizes = [0.0, 0.0, 0.0]		#Total size of the measured subtrees by class mod 3.
+	
+	def get_size(self, root, lg2_bound):
+		return get_subtree_size(root, lg2_bound)
+	
+	def get_rate(self, class_mod3):
+		"""
+		Returns the seconds per unit of size for roots in class_mod3.
+		"""
+		if self.sizes[class_mod3] > 0:
+			return self.seconds[class_mod3]/self.sizes[class_mod3]
+		elif sum(self.sizes) > 0:
+			return sum(self.seconds)/sum(self.sizes)
+		else:
+			return DEFAULT_SECONDS_PER_SIZE
+	
+	def predict(self, root_list, lg2_bound):
+		"""
+		Returns the predicted seconds for the job on the subtrees of root_list.
+		"""
+		return sum([self.get_rate(x%3)*self.get_size(x, lg2_bound) for x in root_list])
+	
+	def observe(self, root_list, lg2_bound, seconds):
+		"""
+		Calibrates the model with a job on root_list that took seconds.  If 
+		root_list mixes classes mod 3 the time is shared out between them in 
+		proportion to their predicted times.
+		"""
+		predicted = [0.0, 0.0, 0.0]
+		sizes = [0.0, 0.0, 0.0]
+		for x in root_list:
+			size = self.get_size(x, lg2_bound)
+			predicted[x%3] = predicted[x%3] + self.get_rate(x%3)*size
+			sizes[x%3] = sizes[x%3] + size
+		for class_mod3 in range(3):		#Only after all of the predictions so they use the same rates.
+			self.sizes[class_mod3] = self.sizes[class_mod3] + sizes[class_mod3]
+		total = sum(predicted)
+		for class_mod3 in range(3):
+			if total > 0:
+				self.seconds[class_mod3] = self.seconds[class_mod3] + seconds*predicted[class_mod3]/total
+
+def lpt_partition(root_list, lg2_bound, num_partitions, cost_model):
+	"""
+	Splits root_list into num_partitions lists with about the same predicted 
+	time using longest processing time first:  the roots are taken from the 
+	most to the least expensive and each goes into the list with the least 
+	predicted time so far.
+	"""
+	costed_list = [(cost_model.predict([x], lg2_bound), x) for x in root_list]
+	costed_list.sort(reverse=True)
+	
+	partitions = [[] for k in range(num_partitions)]
+	heap = [(0.0, k) for k in range(num_partitions)]
+	for cost, x in costed_list:
+		load, k = heapq.heappop(heap)
+		partitions[k].append(x)
+		heapq.heappush(heap, (load + cost, k))
+	return partitions
+
+TASKS_PER_WORKER = 8		#Subtree jobs wanted per worker (or cloud core) so the ends of the bounds even out.
+MIN_FARM_SECONDS = 1.0		#Bounds predicted to take less than this aren't worth farming out.
+
+def get_auto_farm_split(start_num, lg2_bound, num_tasks, cost_model):
+	"""
+	Returns (prop_dict, split_list) like get_farm_split but picks the split 
+	itself instead of stopping at a fixed length:  starting from start_num it 
+	keeps replacing the subtree root with the largest predicted time (see 
+	SubtreeCostModel) by its children until there are at least num_tasks roots 
+	and none of them is predicted to take more than 1/num_tasks of the total.  
+	So every bound gets about num_tasks jobs of about equal time, and a small 
+	bound just gets walked here.
+	
+	prop_dict holds the roots that were replaced and the children congruent 
+	to 0 mod 3 (which have no subtrees).
+	
+	CAVEAT NOTE: !!!!  The roots in split_list are NOT in prop_dict!!!
+	"""
+	bound = 2**lg2_bound
+	prop_dict = PropCounter()
+	heap = []		#(-predicted time, root) so the root with the largest time is on top.
+	total = 0.0
+	if start_num%3 == 0:
+		prop_dict.add(start_num)
+	else:
+		total = cost_model.predict([start_num], lg2_bound)
+		heap.append((-total, start_num))
+	
+	while heap:
+		cost, root = heap[0]
+		if len(heap) >= num_tasks and -cost <= total/num_tasks:
+			break
+		heapq.heappop(heap)
+		total = total + cost
+		prop_dict.add(root)
+		for child in compute_up_level_bounded(root, bound):
+			if child%3 == 0:
+				prop_dict.add(child)
+			else:
+				child_cost = cost_model.predict([child], lg2_bound)
+				heapq.heappush(heap, (-child_cost, child))
+				total = total + child_cost
+	
+	split_list = [root for cost, root in heap]
+	split_list.sort()
+	return prop_dict, split_list
+
+FRONTIER_BYTES_PER_SIZE = 9.0	#The farm roots at a bound add up to about 0.1*2**bound of size and the 2^32 bound needs about 4 GB (a bit under so it fits).
+JOB_BASE_BYTES = 2**20			#Memory of a job besides its levels.  A depth first job needs about this much.
+RSS_CHECK_INTERVAL = 1.0		#Seconds between looks at the memory of the workers.
+
+def get_rss(pid):
+	"""
+	Returns the resident memory in bytes of process pid, or 0 if it can't be
+	read (it finished, or this isn't linux).
+	"""
+	try:
+		statm_file = open('/proc/%d/statm'%pid)
+		try:
+			return int(statm_file.read().split()[1])*os.sysconf('SC_PAGE_SIZE')
+		finally:
+			statm_file.close()
+	except (IOError, OSError, ValueError, IndexError):
+		return 0
+
+class MemoryScheduler(object):
+	"""
+	Keeps the jobs running at once within memory_budget bytes.
+
+	The peak memory of a level by level job is estimated as
+	FRONTIER_BYTES_PER_SIZE times the sizes of its subtrees (see
+	SubtreeCostModel) plus JOB_BASE_BYTES.  A depth first job only keeps a
+	path in memory so it is estimated at JOB_BASE_BYTES.  The estimates are
+	multiplied by scale, which starts at 1 and is raised by check_rss whenever
+	the workers hold more memory than their jobs' estimates say they can.
+
+	admit lets a job start only if its estimate fits next to the jobs already
+	running (a job is always let in when nothing is running, or a job bigger
+	than the budget would never run).  finish gives the memory of a job back.
+	"""
+
+	def __init__(self, memory_budget=MEMORY_BUDGET):
+		self.memory_budget = memory_budget
+		self.scale = 1.0
+		self.running = {}		#Key of each running job -> its unscaled estimate.
+		self.in_use = 0.0		#Sum of the unscaled estimates of the running jobs.
+		self.pid_list = []
+		self.peak_list = []		#The biggest unscaled estimates admitted since watch, one per watched process.
+		self.base_rss = 0
+		self.rss_time = 0.0
+		self.cost_model = SubtreeCostModel()	#Only for the sizes.
+
+	def estimate(self, root_list, lg2_bound, depth_first=False):
+		"""
+		Returns the unscaled estimate in bytes of the peak memory of the job
+		on the subtrees of root_list.
+		"""
+		if depth_first:
+			return float(JOB_BASE_BYTES)
+		size = sum([self.cost_model.get_size(x, lg2_bound) for x in root_list])
+		return JOB_BASE_BYTES + FRONTIER_BYTES_PER_SIZE*size
+
+	def get_num_parts(self, root_list, lg2_bound, depth_first=False):
+		"""
+		Returns the number of parts the jobs on root_list have to be run in, one
+		after another, for each part to fit in memory_budget.
+		"""
+		total = self.estimate(root_list, lg2_bound, depth_first)
+		return max(1, int(math.ceil(self.scale*total/self.memory_budget)))
+
+	def admit(self, root_list, lg2_bound, depth_first=False):
+		"""
+		Returns True and counts the job on root_list as running if it fits in
+		the budget, otherwise returns False.
+		"""
+		cost = self.estimate(root_list, lg2_bound, depth_first)
+		if self.running and self.scale*(self.in_use + cost) > self.memory_budget:
+			return False
+		self.running[tuple(root_list)] = cost
+		self.in_use = self.in_use + cost
+		if self.pid_list:
+			self.peak_list = heapq.nlargest(len(self.pid_list), self.peak_list + [cost])
+		return True
+
+	def finish(self, root_list):
+		"""
+		Gives back the memory of the job on root_list.
+		"""
+		self.in_use = self.in_use - self.running.pop(tuple(root_list), 0.0)
+		if not self.running:
+			self.in_use = 0.0
+
+	def watch(self, pid_list):
+		"""
+		Starts watching the memory of the processes in pid_list (the workers),
+		taking what they hold now, while idle, as the base for check_rss.
+		"""
+		self.pid_list = pid_list
+		self.peak_list = []
+		self.base_rss = sum([get_rss(pid) for pid in pid_list])
+		self.rss_time = time.time()
+
+	def check_rss(self):
+		"""
+		Compares the resident memory of the watched processes above their base
+		with the most the estimates allow them and raises scale if the estimates
+		are too low.  Looks at most once every RSS_CHECK_INTERVAL seconds.
+		
+		A python worker keeps the memory of its finished jobs (freed ints stay 
+		on its free lists) so its RSS is set by the biggest job it has run, not 
+		the one it's running.  So the RSS is compared with the sum of the 
+		biggest estimates admitted since watch, one per worker (at least as 
+		much as the workers' peak estimates add up to), or the running jobs' 
+		estimates if that's more.  Comparing with the running jobs alone would 
+		raise scale a bit with every finished job.
+		"""
+		if time.time() - self.rss_time < RSS_CHECK_INTERVAL:
+			return
+		self.rss_time = time.time()
+		rss = sum([get_rss(pid) for pid in self.pid_list])
+		allowed = max(self.in_use, sum(self.peak_list))
+		if allowed > 0 and rss - self.base_rss > self.scale*allowed:
+			self.scale = float(rss - self.base_rss)/allowed
+
+CLOUD_POLL_INTERVAL = 1.0		#Seconds between asking the cloud which jobs are done.
+CLOUD_FINISHED_STATUSES = ('done', 'error', 'killed', 'stalled')
+
+def cloud_pipeline(job_list, max_in_flight, progress=None):
+	"""
+	Generator that runs cloud_call_of_get_node_list_props on the jobs of 
+	job_list in the cloud and yields (job, prop_dict, seconds) for each as it finishes.  
+	At most max_in_flight jobs are out at once, and as soon as one finishes 
+	the next one goes out, so a slow job only holds up its own slot instead 
+	of a whole batch.  (cloud.result raises the error of a failed job.)  
+	progress (a ProgressReporter) gets a tick at every status poll.
+	"""
+	pending_list = list(job_list)
+	pending_list.reverse()
+	in_flight = {}		#jid -> job
+	while pending_list or in_flight:
+		while pending_list and len(in_flight) < max_in_flight:
+			job = pending_list.pop()
+			jid = cloud.call(cloud_call_of_get_node_list_props, job, _profile=True, _type = "f2")
+			in_flight[jid] = job
+		
+		jids = in_flight.keys()
+		status_list = cloud.status(jids)
+		if progress is not None:
+			progress.tick()
+		finished_jids = [jid for jid, status in zip(jids, status_list) if status in CLOUD_FINISHED_STATUSES]
+		if not finished_jids:
+			time.sleep(CLOUD_POLL_INTERVAL)
+		for jid in finished_jids:
+			prop_dict, seconds = cloud.result(jid)
+			yield in_flight.pop(jid), prop_dict, seconds
+
+def picloud_graph_stats_nograph(start_num, min_lg2_bound, max_lg2_bound, depth_first=False, **run_options):
 	"""
 	This function writes the statistics for the graphs without 
 	creating the graphs.  It's an modification of graph_stats_nograph
 	designed to use the cloud module for some parallelism.
+	
+	The partitions are sized so that NUM_CORES of them fit in MEMORY_BUDGET 
+	(see MemoryScheduler) and at most NUM_CORES are in the cloud at once (see 
+	cloud_pipeline).  If depth_first is True 
+	the jobs walk their subtrees depth first and need next to no memory.
+	
+	run_options work as in graph_stats_nograph.  A cloud job counts as done 
+	in the checkpoint once its result is merged.  Subtrees in the cache 
+	aren't sent out, but since the cloud jobs are whole partitions nothing 
+	new gets saved there.
 
 	"""
+	if cloud is None:
+		raise ImportError("The cloud module is not installed.  Use local_graph_stats_nograph instead.")
 
-	stats_file = open('graph_stats.txt',"w")
-	prev_count = 1
+	run = StatsRun(start_num, max_lg2_bound, **run_options)
+	checkpoint = run.checkpoint
+	cost_model = SubtreeCostModel()
+	memory_scheduler = MemoryScheduler()
 	
 	for i in range(min_lg2_bound, max_lg2_bound+1):
 	
-		prop_dict = {}
-		
-		start_time = time.time()
-		start_clock = time.clock()
+		prop_dict = run.start_bound(i)
 		
-		### Do the initial levels creating a list of nodes to farm off to the cloud as we go
-		cur_level = [start_num]
-		farm_list = []
-				
-		FARM_BREAK_POINT = 14	#TUNE THIS BOUND FOR PARALLELISM.  Bigger means more nodes in farm_list and more compute time to start.
-		for level in range(100):  #TUNE THIS BOUND FOR PARALLELISM  In practice make this large enough so that the subtree defined by the FARM_BREAK_POINT bound is completely computed.
-			cur_prop_dict = get_stats(cur_level)
-			prop_dict = merge_props(cur_prop_dict, prop_dict)
-			next_level = []
-			for target in cur_level:
-				temp = compute_up_level(target, 2+ int((i - get_length(target))/2)) #Note:  How many terms we need
-				if 1 in temp:										#depends on the length.  This speeds things up
-					temp.remove(1)									#even with an extra call to get_length.
-				trimmed_temp = [x for x in temp if x<= 2**i]
-				next_level.extend(trimmed_temp)
-			cur_level = [x for x in next_level if get_length(x) <FARM_BREAK_POINT]			
-			farm_list.extend([x for x in next_level if get_length(x) >= FARM_BREAK_POINT])
-		
-		cur_level.extend(farm_list)
-		###Split the list (which is cur_level).  
-		add_list = [x for x in cur_level if x%3 == 0]
-		split_list = [x for x in cur_level if x%3 != 0]
-		split_list.sort()
-		split_list1 = [x for x in split_list if x%3 == 1]
-		split_list2 = [x for x in split_list if x%3 == 2]
-		split_list2.reverse()
-		
-		print "Subtree count: %d "%(len(split_list))
-		print split_list[0:20]
-
-		###Add the mod3 = 0 class to prop_dict. 
-		prop_dict = merge_props(prop_dict, get_stats(add_list))
-
-		###Partition the split_list into sublists for jobs.		
-		if i>MAX_BOUND_ON_MACHINE:
-			num_partitions =  NUM_CORES*(i-MAX_BOUND_ON_MACHINE + 1)
+		if prop_dict is not None:		#Finished in the checkpoint.
+			pass
+		elif run.out_of_time(i):
+			break
 		else:
-			num_partitions = NUM_CORES
-		
-		temp = {}
-		for k in range(num_partitions):	
-			temp1 = [split_list1[n] for n in range(k,len(split_list1),num_partitions)]
-			temp2 = [split_list2[n] for n in range(k,len(split_list2),num_partitions)]
-			temp[k] = temp1 + temp2
-		print "Partition %d has %d mod 1 nodes and %d mod 2 nodes"%(k,len(temp1),len(temp2))
-		split_list = []
-		for k in range(num_partitions):
-			split_list.append(temp[k])
-
-
-		###  Send the rest of the list out as separate jobs to the cloud.
-		cloud_split_list = [ (x,i) for x in split_list]
-		marker = 0
-		while marker < num_partitions:
-			print "Running cloud jobs %d to %d"%(marker,marker+NUM_CORES-1)
-			jids = cloud.map(cloud_call_of_get_node_list_props,cloud_split_list[marker:marker + NUM_CORES],_profile=True, _type = "f2")  #Send the get_node_list jobs to cloud
-			cloud_results = cloud.result(jids) #Collect the property dictionaries back from cloud
-			marker = marker + NUM_CORES
+			### Do the initial levels creating a list of nodes to farm off to the cloud as we go
+			prop_dict, split_list = get_auto_farm_split(start_num, i, TASKS_PER_WORKER*NUM_CORES, cost_model)
+			prop_dict, split_list, done_set = start_checkpoint_bound(checkpoint, i, prop_dict, split_list)
+			pending_list = [x for x in split_list if x not in done_set]
+			pending_list = merge_cached_subtrees(run.cache, pending_list, i, prop_dict, checkpoint['done'])
+		
+			print "Subtree count: %d "%(len(split_list))
+			print split_list[0:20]
+			
+			if cost_model.predict(pending_list, i) < MIN_FARM_SECONDS:
+				###  Not worth sending to the cloud.
+				prop_dict = merge_props(prop_dict, get_node_list_props_from_list(pending_list, i, depth_first))
+				checkpoint['done'].extend(pending_list)
+			else:
+				###Partition the split_list into sublists for jobs, in as many serial parts of NUM_CORES 
+				###jobs as the memory budget needs.  Depth first jobs need next to no memory.
+				num_partitions = NUM_CORES*memory_scheduler.get_num_parts(pending_list, i, depth_first)
+		
+				split_list = lpt_partition(pending_list, i, num_partitions, cost_model)
+				for k in range(num_partitions):
+					print "Partition %d has %d mod 1 nodes and %d mod 2 nodes, predicted time %.6g"%(k,len([x for x in split_list[k] if x%3 == 1]),len([x for x in split_list[k] if x%3 == 2]),cost_model.predict(split_list[k],i))
+
+
+				###  Send the rest of the list out as separate jobs to the cloud, NUM_CORES at a time, 
+				###  merging each result as it comes back.
+				cloud_split_list = [ (x,i,depth_first) for x in split_list]
+				run.progress.start_bound(i, dict([(tuple(x), cost_model.predict(x,i)) for x in split_list]))
+				for job, c_dict, c_seconds in cloud_pipeline(cloud_split_list, NUM_CORES, run.progress):
+					prop_dict = merge_props(prop_dict,c_dict)
+					cost_model.observe(job[0], i, c_seconds)
+					checkpoint['done'].extend(job[0])
+					run.progress.job_done(tuple(job[0]))
+					if run.checkpoint_due():
+						run.save()
+		
+			run.finish_bound(i, prop_dict)
+			print "Cost model: %.3g seconds per unit of size for 1 mod 3 roots, %.3g for 2 mod 3 roots"%(cost_model.get_rate(1), cost_model.get_rate(2))
 			
+		
+			"""
+			jids = cloud.map(cloud_call_of_get_node_list_props,cloud_split_list)  #Send the get_node_list jobs to cloud
+			cloud_results = cloud.result(jids) #Collect the property dictionaries back from cloud
+		
 			### Merge the separate jobs back into the property list.
 			for c_dict in cloud_results:		#Merge cloud results together
-				prop_dict = merge_props(c_dict,prop_dict)
-			
+				prop_dict = merge_props(prop_dict,c_dict)
+			"""
+
 		
+		run.report_bound(i, prop_dict, True)
+	run.close()
+
+	return 'done'
+
+
+
+#############################################
+#
+#
+#  LOCAL MULTIPROCESSING SECTION
+#
+#
+#############################################
+
+
+class SharedPropSlots(object):
+	"""
+	Shared memory the local workers count into so their PropCounters never 
+	have to be pickled back and merged one at a time.
+	
+	counts has a slot of 9*num_lengths counts, laid out like the counts of a 
+	PropCounter, for each of num_workers workers.  committed has a flag for 
+	each of num_jobs jobs (room for that many, the driver can add jobs), set 
+	when the job's counts are added to a slot, and cancelled has a flag set 
+	when the driver gives up on the job.  They only change under lock so a 
+	job is either committed or cancelled, never both:  reduce always sees the 
+	counts of exactly the committed jobs and a job can never be counted twice.
+	start_times has the time each job was started by a worker (0 until then), 
+	so the driver can tell how long a job has really been running and not 
+	just waiting in the pool's queue.
+	
+	The object is handed to the workers through the Pool initializer 
+	(init_shared_worker) and each worker claims its own slot there.
+	"""
+	
+	def __init__(self, num_workers, num_lengths, num_jobs):
+		self.num_workers = num_workers
+		self.num_cells = 9*num_lengths
+		self.counts = multiprocessing.RawArray(COUNT_TYPECODE, num_workers*self.num_cells)
+		self.committed = multiprocessing.RawArray('b', max(num_jobs, 1))
+		self.cancelled = multiprocessing.RawArray('b', max(num_jobs, 1))
+		self.start_times = multiprocessing.RawArray('d', max(num_jobs, 1))
+		self.lock = multiprocessing.Lock()
+		self.next_slot = multiprocessing.RawValue('i', 0)
+		self.slot = None		#Set in each worker by claim_slot.
+	
+	def claim_slot(self):
+		self.lock.acquire()
+		try:
+			self.slot = self.next_slot.value
+			self.next_slot.value = self.slot + 1
+		finally:
+			self.lock.release()
+	
+	def commit(self, job_index, prop_dict):
 		"""
-		jids = cloud.map(cloud_call_of_get_node_list_props,cloud_split_list)  #Send the get_node_list jobs to cloud
-		cloud_results = cloud.result(jids) #Collect the property dictionaries back from cloud
-		
-		### Merge the separate jobs back into the property list.
-		for c_dict in cloud_results:		#Merge cloud results together
-			prop_dict = merge_props(c_dict,prop_dict)
+		Adds prop_dict, the result of job job_index, to this worker's slot 
+		unless the job was already committed or was cancelled.  Returns True if 
+		it was added.
 		"""
-
+		if len(prop_dict.counts) > self.num_cells:
+			raise ValueError("A job found numbers longer than the shared slots have room for.")
+		offset = self.slot*self.num_cells
+		self.lock.acquire()
+		try:
+			if self.committed[job_index] or self.cancelled[job_index]:
+				return False
+			counts = self.counts
+			for index, count in enumerate(prop_dict.counts):
+				if count:
+					counts[offset + index] += count
+			self.committed[job_index] = 1
+			return True
+		finally:
+			self.lock.release()
+	
+	def cancel(self, job_index):
+		"""
+		Cancels job job_index unless it was already committed.  Returns True if 
+		it was cancelled, and then its counts will never be added.
+		"""
+		self.lock.acquire()
+		try:
+			if self.committed[job_index]:
+				return False
+			self.cancelled[job_index] = 1
+			return True
+		finally:
+			self.lock.release()
+	
+	def start(self, job_index):
+		"""
+		Notes that a worker is starting job job_index now.  (Only that worker 
+		writes the job's time so no lock is needed.)
+		"""
+		self.start_times[job_index] = time.time()
+	
+	def get_start_time(self, job_index):
+		"""
+		Returns when a worker started job job_index, or None if none has yet.
+		"""
+		start_time = self.start_times[job_index]
+		if start_time > 0:
+			return start_time
+		return None
+	
+	def check_cancelled(self, job_index):
+		"""
+		Raises JobCancelled if job job_index was cancelled.  (No lock needed to 
+		read a flag.)
+		"""
+		if self.cancelled[job_index]:
+			raise JobCancelled()
+	
+	def reduce(self):
+		"""
+		Returns (prop_dict, committed_list) where prop_dict is a PropCounter 
+		with the sum of the slots and committed_list holds the indices of the 
+		jobs in it.  The slots are added up pairwise, a tree of log2(num_workers) 
+		rounds, on a copy taken under the lock.
+		"""
+		self.lock.acquire()
+		try:
+			slot_list = [array.array(COUNT_TYPECODE, self.counts[k*self.num_cells:(k+1)*self.num_cells]) for k in range(self.num_workers)]
+			committed_list = [k for k, flag in enumerate(self.committed) if flag]
+		finally:
+			self.lock.release()
 		
-		prop_time = time.time()
-		prop_clock = time.clock()
+		step = 1
+		while step < len(slot_list):
+			for k in range(0, len(slot_list) - step, 2*step):
+				total, other = slot_list[k], slot_list[k + step]
+				for index in range(self.num_cells):
+					total[index] += other[index]
+			step = 2*step
 		
-		#Output the property dictionary data to log file.
-		prop_keys = prop_dict.keys()
-		cur_count = sum(prop_dict.values())
-		print "%d nodes = %.2f bits of nodes for %d bits \n"%(cur_count,math.log(cur_count,2),i)
-				
-		#Now it's time to assemble some statistics
-		write_str = "%3d BIT BOUND: \n \n"%(i)
-		stats_file.write(write_str)
-		write_str = "\t Number of nodes: %22d  %20.2f bits\n"%(cur_count, math.log(cur_count,2))
-		stats_file.write(write_str)
-		write_str = "\t Number of previously seen nodes: %6d  %20.2f bits\n"%(prev_count,math.log(prev_count ,2))
-		stats_file.write(write_str)
-		write_str = "\t Number of new nodes: %18d  %20.2f bits\n"%(cur_count-prev_count,math.log(cur_count-prev_count ,2))
-		stats_file.write(write_str)
-		write_str = "\t Percentage of new nodes: %14.2f \n"%(1.0*(cur_count-prev_count)/cur_count)
-		stats_file.write(write_str)
-	
-		
-		#Put together # of things in each congruence class
-		class0_count = sum([prop_dict[x] for x in prop_keys if x[0] == 0])
-		class1_count = sum([prop_dict[x] for x in prop_keys if x[0] == 1])
-		class2_count = sum([prop_dict[x] for x in prop_keys if x[0] == 2])
-	
-		stats_file.write("\n")
-		stats_file.write("\t NUMBER OF NODES IN CONGRUENCE CLASSES MODULO 3 \n\n")
-		stats_file.write("\t \t 0 \t %8d \n"%(class0_count))
-		stats_file.write("\t \t 1 \t %8d \n"%(class1_count))
-		stats_file.write("\t \t 2 \t %8d \n"%(class2_count))
-		
-		#Put together # of things with even/odd descendents by congruence class
-		
-		class1_even_count = sum([prop_dict[x] for x in prop_keys if x[0] == 1 and x[3] == 0])
-		class1_odd_count = sum([prop_dict[x] for x in prop_keys if x[0] == 1 and x[3] == 1])
-		class2_even_count = sum([prop_dict[x] for x in prop_keys if x[0] == 2 and x[3] == 0])
-		class2_odd_count = sum([prop_dict[x] for x in prop_keys if x[0] == 2 and x[3] == 1])
-		
-		stats_file.write("\n")
-		stats_file.write("\t NUMBER OF NODES WITH EVEN/ODD DECENDANTS \n\n")
-		stats_file.write("\t %8s \t %8s \t %8s \t %8s \n "%('PARITY', 'COUNT', '1COUNT', '2COUNT'))
-		stats_file.write("\t %8s \t %8d \t %8d \t %8d \n "%('EVEN', class1_even_count + class2_even_count,class1_even_count,class2_even_count))
-		stats_file.write("\t %8s \t %8d \t %8d \t %8d \n "%('ODD', class1_odd_count + class2_odd_count,class1_odd_count,class2_odd_count))
-		
-		stats_file.write("\n")
-		stats_file.write("\t BREAKDOWN OF NODES\n\n")
-		w_str = create_stats_table(prop_dict)
-		stats_file.write(w_str)
-		
-		stats_file.write("\n")
-		stats_file.write("\t NUMBER OF NODES OF A GIVEN LENGTH \n\n")
-		stats_file.write("\t %8s \t %8s \t %8s \t %8s \t %8s \t %8s \t %8s \n"%('LENGTH','ACT. NODES','MAX POSS.', '% OF POSS.', '#0 MOD3','#1 MOD3','#2 MOD3'))
-		for j in range(i):
-			num_of_length0 = sum([prop_dict[x] for x in prop_keys if x[1] == j and x[0] == 0])
-			num_of_length1 = sum([prop_dict[x] for x in prop_keys if x[1] == j and x[0] == 1])
-			num_of_length2 = sum([prop_dict[x] for x in prop_keys if x[1] == j and x[0] == 2])
-			num_of_length = num_of_length0 + num_of_length1 + num_of_length2
-			
-			max_poss = max_poss_of_length(j)
-			stats_file.write("\t \t %d \t %8d \t %8d \t %3.5f \t %8d \t %8d \t %8d\n"%(j,num_of_length,max_poss,1.0*num_of_length/max_poss, num_of_length0, num_of_length1,num_of_length2))
+		prop_dict = PropCounter()
+		prop_dict.counts = slot_list[0]
+		return prop_dict, committed_list
 
-		stats_file.write("\n")
-		
-		#prev_seen_list = [x for x in seen_list]
-		prev_count = cur_count
+SHARED_SLOTS = None		#The SharedPropSlots of a local worker process.
+WORKER_CACHE = None		#The SubtreeCache of a local worker process (if any).
+
+def init_shared_worker(shared_slots, cache_dir=None):
+	"""
+	Pool initializer for the local workers.  Claims a slot of shared_slots 
+	and opens the SubtreeCache in cache_dir if there is one.
+	"""
+	global SHARED_SLOTS, WORKER_CACHE
+	shared_slots.claim_slot()
+	SHARED_SLOTS = shared_slots
+	if cache_dir is not None:
+		WORKER_CACHE = SubtreeCache(cache_dir)
+
+def local_call_of_get_node_list_props(data):
+	"""
+	Same as cloud_call_of_get_node_list_props for 
+	data = (job_index, start_list, lg2_bound, depth_first) but the property 
+	dictionary is committed to the worker's slot of SHARED_SLOTS instead of 
+	being returned.  Returns (job_index, start_list, seconds) so the driver 
+	knows which job just finished and how long it took.
+	
+	The walk stops early, committing nothing, if the driver cancels the job.  
+	The subtrees go through WORKER_CACHE (see get_node_list_props_cached).
+	"""
+	job_start_time = time.time()
+	job_index = data[0]
+	SHARED_SLOTS.start(job_index)
+	try:
+		prop_dict = get_node_list_props_cached(data[1], data[2], WORKER_CACHE, data[3], lambda: SHARED_SLOTS.check_cancelled(job_index))
+		SHARED_SLOTS.commit(job_index, prop_dict)
+	except JobCancelled:
+		pass
+	return job_index, data[1], time.time() - job_start_time
+
+LOCAL_JOBS_PER_WORKER = 2		#Jobs kept in flight per worker so a worker never waits on the driver.
+RESULT_POLL_INTERVAL = 1.0		#Seconds between checks for failed jobs while waiting on results.
+STRAGGLER_FACTOR = 4.0			#A job taking this many times its predicted time gets split...
+STRAGGLER_MIN_SECONDS = 60.0	#...as long as it has taken at least this long.
+SPLIT_JOB_ROOM = 4096			#Room for this many jobs from splitting in a bound.
+
+def local_pipeline(pool, job_list, max_in_flight, memory_scheduler, straggler_check=None, shared_slots=None, progress=None):
+	"""
+	Generator that runs local_call_of_get_node_list_props on the jobs of 
+	job_list in pool and yields its (job_index, start_list, seconds) for each 
+	job as it finishes.  
+	
+	The jobs go out with apply_async in the order of job_list as soon as there 
+	is room:  fewer than max_in_flight jobs out and the next job admitted by 
+	memory_scheduler.  Each finished job makes room for the next one right 
+	away, so there are no batches waiting on their slowest job.  The error of 
+	a failed job is raised here.
+	
+	Jobs appended to job_list along the way get run too.  If straggler_check 
+	is given it's called as straggler_check(job, seconds) for the jobs still 
+	out that a worker has started, with the seconds since the worker started 
+	them (from shared_slots, the SharedPropSlots of the workers), each time a 
+	job finishes or RESULT_POLL_INTERVAL goes by.  Jobs still waiting in the 
+	pool's queue aren't checked.  progress (a ProgressReporter) gets a tick 
+	every RESULT_POLL_INTERVAL that goes by without a result.
+	"""
+	result_queue = Queue.Queue()
+	in_flight = {}		#job_index -> AsyncResult
+	next_job = 0
+	while next_job < len(job_list) or in_flight:
+		while next_job < len(job_list) and len(in_flight) < max_in_flight:
+			job = job_list[next_job]
+			if not memory_scheduler.admit(job[1], job[2], job[3]):
+				break
+			in_flight[job[0]] = pool.apply_async(local_call_of_get_node_list_props, (job,), callback=result_queue.put)
+			next_job = next_job + 1
 		
-		stat_time = time.time()
-		stat_clock = time.clock()
+		try:
+			job_index, start_list, seconds = result_queue.get(True, RESULT_POLL_INTERVAL)
+		except Queue.Empty:
+			job_index = None
+			if progress is not None:
+				progress.tick()
+			for async_result in in_flight.values():
+				if async_result.ready() and not async_result.successful():
+					async_result.get()
+		if straggler_check is not None and shared_slots is not None:
+			for k in in_flight.keys():
+				start_time = shared_slots.get_start_time(k)
+				if k != job_index and start_time is not None:
+					straggler_check(job_list[k], time.time() - start_time)
+		if job_index is None:
+			continue
+		del in_flight[job_index]
+		memory_scheduler.check_rss()
+		memory_scheduler.finish(start_list)
+		yield job_index, start_list, seconds
+
+def local_graph_stats_nograph(start_num, min_lg2_bound, max_lg2_bound, num_workers=None, depth_first=False, memory_budget=MEMORY_BUDGET, **run_options):
+	"""
+	This function writes the statistics for the graphs without 
+	creating the graphs.  It's the same computation as 
+	picloud_graph_stats_nograph but the subtrees are farmed out to a pool of 
+	num_workers processes on this machine (all of the cores by default).
+	
+	Every subtree root is its own job and the jobs are handed out one at a time 
+	to whichever worker is free next, longest predicted time first (see 
+	local_pipeline and SubtreeCostModel, which is calibrated from the jobs as 
+	they finish).  
+	So a few heavy subtrees near the root keep a few workers busy while the 
+	rest of the workers chew through the small ones instead of sitting idle 
+	waiting on a fixed batch.
+	
+	The workers add their counts into shared memory (see SharedPropSlots) 
+	which is summed up once at the end of each bound, so nothing but job 
+	numbers and times goes back through the pool.  There's a new pool for 
+	each bound since the shared memory is sized for the bound.
+	
+	The workers use the level by level walk by default, which is many times 
+	faster than the depth first one.  Jobs are only started while their 
+	estimated memory fits in memory_budget (see MemoryScheduler) so big 
+	bounds run fewer jobs at once instead of running out of memory.  Pass 
+	depth_first=True to walk the subtrees depth first, so each worker needs 
+	very little memory at the cost of speed.
+	
+	A job still running after STRAGGLER_FACTOR times its predicted time (and 
+	at least STRAGGLER_MIN_SECONDS) is split:  it's cancelled, its root is 
+	counted here, and the children of the root go out as new jobs.  The 
+	cancel and the commit of a job's counts are decided under one lock (see 
+	SharedPropSlots) so its subtree is counted exactly once either way.
+	
+	run_options work as in graph_stats_nograph.  The subtrees in the cache 
+	are merged here and the workers save the ones they walk.
+	"""
+	if num_workers is None:
+		num_workers = multiprocessing.cpu_count()
 
-		#Note when the cloud is actually called, the CPU time will not reflect 'cloud' time.
-		print "%30s %12s %12s"%(' ','CPU TIME', 'WALL TIME')
-		print "%30s %12.6f %12.6f "%('Computing prop_dict', prop_clock - start_clock, prop_time-start_time)
-		print "%30s %12.6f %12.6f "%('Outputing statistics', stat_clock - prop_clock, stat_time-prop_time)
-		print "%30s %12.6f %12.6f \n"%('Totals', stat_clock - start_clock, stat_time-start_time)		
-	stats_file.close()
+	run = StatsRun(start_num, max_lg2_bound, **run_options)
+	checkpoint = run.checkpoint
+	cost_model = SubtreeCostModel()
+	memory_scheduler = MemoryScheduler(memory_budget)
+	
+	for i in range(min_lg2_bound, max_lg2_bound+1):
+	
+		prop_dict = run.start_bound(i)
+		
+		if prop_dict is not None:		#Finished in the checkpoint.
+			pass
+		elif run.out_of_time(i):
+			break
+		else:
+			### Do the initial levels creating a list of nodes to farm off to the workers.
+			prop_dict, split_list = get_auto_farm_split(start_num, i, TASKS_PER_WORKER*num_workers, cost_model)
+			prop_dict, split_list, done_set = start_checkpoint_bound(checkpoint, i, prop_dict, split_list)
+			print "Subtree count: %d "%(len(split_list))
+			pending_list = [x for x in split_list if x not in done_set]
+			pending_list = merge_cached_subtrees(run.cache, pending_list, i, prop_dict, checkpoint['done'])
+			
+			if cost_model.predict(pending_list, i) < MIN_FARM_SECONDS:
+				###  Not worth starting the workers.
+				prop_dict = merge_props(prop_dict, get_node_list_props_from_list(pending_list, i, depth_first))
+				checkpoint['done'].extend(pending_list)
+			else:
+				###  Send each subtree out as a separate job.  The counts pile up in shared_slots.
+				pending_list.sort(key=lambda x: cost_model.predict([x],i), reverse=True)
+				job_list = [ (k,[x],i,depth_first) for k, x in enumerate(pending_list)]
+				run.progress.start_bound(i, dict([(job[0], cost_model.predict(job[1],i)) for job in job_list]))
+				shared_slots = SharedPropSlots(num_workers, i+1, len(job_list) + SPLIT_JOB_ROOM)
+				pool = multiprocessing.Pool(num_workers, init_shared_worker, (shared_slots, run.cache_dir))
+				memory_scheduler.watch([p.pid for p in multiprocessing.active_children()])
+				split_set = set()
+			
+				def split_straggler(job, seconds):
+					"""
+					Splits job if it's taking too long (see above).  The roots of its 
+					children join the checkpoint's roots and its own root is done.
+					"""
+					job_index, root_list, lg2_bound = job[0], job[1], job[2]
+					if job_index in split_set or len(job_list) + len(root_list)*lg2_bound > len(shared_slots.committed):
+						return
+					if seconds < STRAGGLER_MIN_SECONDS or seconds < STRAGGLER_FACTOR*cost_model.predict(root_list, lg2_bound):
+						return
+					if not shared_slots.cancel(job_index):		#It just finished.
+						return
+					split_set.add(job_index)
+					num_jobs = len(job_list)
+					for root in root_list:
+						prop_dict.add(root)
+						child_list = list(compute_up_level_bounded(root, 2**lg2_bound))
+						for child in child_list:
+							job_list.append((len(job_list), [child], lg2_bound, job[3]))
+						split_list.extend(child_list)
+						checkpoint['done'].append(root)
+					run.progress.split_job(job_index, dict([(k, cost_model.predict(job_list[k][1], lg2_bound)) for k in range(num_jobs, len(job_list))]))
+					print "Split the job on %s after %.1f seconds into %d jobs"%(root_list, seconds, len(job_list) - num_jobs)
+			
+				for c_index, c_list, c_seconds in local_pipeline(pool, job_list, LOCAL_JOBS_PER_WORKER*num_workers, memory_scheduler, split_straggler, shared_slots, run.progress):
+					if c_index not in split_set:
+						cost_model.observe(c_list, i, c_seconds)
+					run.progress.job_done(c_index)
+					if run.checkpoint_due():
+						###  Checkpoint a copy with the counts and roots of the jobs committed so far.
+						slot_dict, committed_list = shared_slots.reduce()
+						saved_checkpoint = dict(checkpoint)
+						saved_checkpoint['props'] = merge_props(PropCounter().merge(prop_dict), slot_dict)
+						saved_checkpoint['done'] = checkpoint['done'] + [x for k in committed_list for x in job_list[k][1]]
+						run.save(saved_checkpoint)
+				pool.close()
+				pool.join()
+			
+				slot_dict, committed_list = shared_slots.reduce()
+				prop_dict = merge_props(prop_dict, slot_dict)
+			run.finish_bound(i, prop_dict)
+			print "Cost model: %.3g seconds per unit of size for 1 mod 3 roots, %.3g for 2 mod 3 roots"%(cost_model.get_rate(1), cost_model.get_rate(2))
+		
+		run.report_bound(i, prop_dict, True)
+	
+	run.close()
 
 	return 'done'
 
 
+
+#############################################
+#
+#
+#  COORDINATOR / WORKER SECTION  
+#  (For spreading a run over our own machines like the pi.cloud version did.)
+#
+#
+#############################################
+
+
+COORDINATOR_PORT = 50017
+REQUEUE_SECONDS = 600.0		#A worker not heard from for this long is taken to be dead and its jobs are sent again.
+HEARTBEAT_SECONDS = 60.0	#Seconds between the heartbeats of a worker.
+
+class CoordinatorTaskQueue(Queue.Queue):
+	"""
+	The coordinator's task queue, which also lets a worker take a job.
+	"""
+	
+	def take(self, name):
+		"""
+		Gets the next job off the queue, waiting for one, and for a job (not a 
+		stop) puts ('taken', job_index, lg2_bound, name) on the result queue 
+		before returning it.  Since this runs in the manager's process the job 
+		is marked as taken in the same round trip that hands it out, so a 
+		worker that dies with the job is always caught.
+		"""
+		job = self.get()
+		if job is not None:
+			COORDINATOR_RESULT_QUEUE.put(('taken', job[0], job[2], name))
+		return job
+
+COORDINATOR_TASK_QUEUE = CoordinatorTaskQueue()		#Only used in the coordinator's manager process.
+COORDINATOR_RESULT_QUEUE = Queue.Queue()
+
+def get_coordinator_task_queue():
+	return COORDINATOR_TASK_QUEUE
+
+def get_coordinator_result_queue():
+	return COORDINATOR_RESULT_QUEUE
+
+class CoordinatorManager(multiprocessing.managers.BaseManager):
+	"""
+	Serves the task queue and the result queue of coordinator_graph_stats_nograph.
+	"""
+	pass
+
+CoordinatorManager.register('get_task_queue', callable=get_coordinator_task_queue)
+CoordinatorManager.register('get_result_queue', callable=get_coordinator_result_queue)
+
+class WorkerManager(multiprocessing.managers.BaseManager):
+	"""
+	A worker's connection to a CoordinatorManager.
+	"""
+	pass
+
+WorkerManager.register('get_task_queue')
+WorkerManager.register('get_result_queue')
+
+def coordinator_worker(host, authkey, port=COORDINATOR_PORT):
+	"""
+	Works for the coordinator at (host, port) until it says stop.  authkey is 
+	the key the coordinator printed when it started.  Run one of these for 
+	each core of each machine, e.g.
+	
+		python -c "import graph_stats; graph_stats.coordinator_worker('bigbox', '<authkey>')"
+	
+	The worker puts ('hello', name) on the result queue and then takes jobs 
+	(job_index, start_list, lg2_bound, depth_first) off the task queue with 
+	CoordinatorTaskQueue.take, which puts ('taken', job_index, lg2_bound, name) 
+	on the result queue for it.  When a job is done the worker puts 
+	('result', job_index, lg2_bound, counts, seconds, name) on the result 
+	queue, where counts is the to_bytes of the PropCounter.  A None job 
+	means stop and the worker answers ('bye', name).  All along a thread puts 
+	('heartbeat', name) on the result queue every HEARTBEAT_SECONDS so the 
+	coordinator knows the worker is alive during long jobs.  The worker also 
+	just stops if the coordinator goes away.
+	"""
+	manager = WorkerManager(address=(host, port), authkey=authkey)
+	manager.connect()
+	task_queue = manager.get_task_queue()
+	result_queue = manager.get_result_queue()
+	name = '%s:%d'%(socket.gethostname(), os.getpid())
+	stop_event = threading.Event()
+	
+	def send_heartbeats():
+		"""
+		Puts a heartbeat on the result queue every HEARTBEAT_SECONDS until 
+		stop_event is set.
+		"""
+		heartbeat_queue = manager.get_result_queue()		#A proxy for this thread.
+		try:
+			while not stop_event.wait(HEARTBEAT_SECONDS):
+				heartbeat_queue.put(('heartbeat', name))
+		except (IOError, EOFError, socket.error):
+			pass
+		del heartbeat_queue
+	
+	heartbeat_thread = threading.Thread(target=send_heartbeats)
+	heartbeat_thread.daemon = True
+	try:
+		result_queue.put(('hello', name))
+		heartbeat_thread.start()
+		while True:
+			job = task_queue.take(name)
+			if job is None:
+				stop_event.set()
+				heartbeat_thread.join()
+				del task_queue		#Let go of the proxy while the coordinator is still there.
+				result_queue.put(('bye', name))
+				break
+			job_start_time = time.time()
+			prop_dict = get_node_list_props_from_list(job[1], job[2], job[3])
+			result_queue.put(('result', job[0], job[2], prop_dict.to_bytes(), time.time() - job_start_time, name))
+	except (IOError, EOFError, socket.error):		#The coordinator is gone.
+		pass
+	stop_event.set()
+
+def start_local_workers(num_workers, port, authkey):
+	"""
+	Starts num_workers coordinator_worker processes on this machine working for 
+	the coordinator on port.  Returns the list of processes.
+	"""
+	process_list = []
+	for k in range(num_workers):
+		process = multiprocessing.Process(target=coordinator_worker, args=('localhost', authkey, port))
+		process.daemon = True
+		process.start()
+		process_list.append(process)
+	return process_list
+
+def coordinator_graph_stats_nograph(start_num, min_lg2_bound, max_lg2_bound, num_workers, port=COORDINATOR_PORT, authkey=None, depth_first=False, local_workers=0, **run_options):
+	"""
+	This function writes the statistics for the graphs without 
+	creating the graphs.  It's the same computation as 
+	local_graph_stats_nograph but the subtrees are handed out to 
+	coordinator_worker processes, on any machines, that connect to port.  
+	num_workers is how many workers the split is made for (see 
+	get_auto_farm_split); they can come and go as they like.
+	
+	The jobs go on a task queue served by a multiprocessing manager and the 
+	workers take the next job as soon as they finish one.  The results come 
+	back as compact PropCounter strings and are merged as they arrive.  
+	
+	Each job is marked with the worker that takes it as it's handed out (see 
+	CoordinatorTaskQueue.take) and the workers send heartbeats (see 
+	coordinator_worker).  A worker that says bye or isn't heard from for 
+	REQUEUE_SECONDS (it died, say) is dropped and only the jobs it took that 
+	aren't done yet get sent again.  Jobs nobody has taken are never sent 
+	again, so long jobs don't pile up on the task queue.  A result for a job 
+	that is already done is ignored.  At the end every worker still around 
+	is told to stop.
+	
+	local_workers > 0 starts that many workers on this machine, which with 
+	port=0 (any free port) is the way to try it all out on one box.  When 
+	local_workers covers num_workers the coordinator only listens on 
+	localhost, otherwise it listens on every interface for the other 
+	machines.  Since the manager unpickles what the workers send, the 
+	authkey is a random one unless authkey is given, and it's printed with 
+	the port for starting the workers.
+	
+	The workers use the fast level by level walk unless depth_first is True.  
+	There is no MemoryScheduler across machines, so for bounds whose jobs 
+	don't fit in a worker machine's memory pass depth_first=True.
+	
+	run_options work as in graph_stats_nograph.  The coordinator does all of the reading 
+	and saving of the cache.
+	"""
+	if authkey is None:
+		authkey = os.urandom(16).encode('hex')
+	if local_workers >= num_workers:
+		host = 'localhost'
+	else:
+		host = ''
+	manager = CoordinatorManager(address=(host, port), authkey=authkey)
+	manager.start()
+	task_queue = manager.get_task_queue()
+	result_queue = manager.get_result_queue()
+	port = manager.address[1]
+	print "Coordinator listening on %s port %d with authkey %s"%(host or socket.gethostname(), port, authkey)
+	process_list = start_local_workers(local_workers, port, authkey)
+	worker_set = set()
+	worker_seen = {}		#When each worker in worker_set was last heard from.
+	
+	run = StatsRun(start_num, max_lg2_bound, **run_options)
+	checkpoint = run.checkpoint
+	cost_model = SubtreeCostModel()
+	
+	for i in range(min_lg2_bound, max_lg2_bound+1):
+	
+		prop_dict = run.start_bound(i)
+		
+		if prop_dict is not None:		#Finished in the checkpoint.
+			pass
+		elif run.out_of_time(i):
+			break
+		else:
+			### Do the initial levels creating a list of nodes to farm off to the workers.
+			prop_dict, split_list = get_auto_farm_split(start_num, i, TASKS_PER_WORKER*num_workers, cost_model)
+			prop_dict, split_list, done_set = start_checkpoint_bound(checkpoint, i, prop_dict, split_list)
+			print "Subtree count: %d "%(len(split_list))
+			
+			###  Put every subtree on the task queue, longest predicted time first, and merge the results.
+			pending_list = [x for x in split_list if x not in done_set]
+			pending_list = merge_cached_subtrees(run.cache, pending_list, i, prop_dict, checkpoint['done'])
+			pending_list.sort(key=lambda x: cost_model.predict([x],i), reverse=True)
+			job_list = [ (k,[x],i,depth_first) for k, x in enumerate(pending_list)]
+			run.progress.start_bound(i, dict([(job[0], cost_model.predict(job[1],i)) for job in job_list]))
+			for job in job_list:
+				task_queue.put(job)
+			out_set = set(range(len(job_list)))
+			taken_dict = {}		#Name of the worker that took each job still out.
+			while out_set:
+				try:
+					message = result_queue.get(True, HEARTBEAT_SECONDS)
+				except Queue.Empty:
+					message = None
+				
+				if message is not None and message[0] != 'bye':
+					if message[-1] not in worker_set:
+						print "Worker %s joined"%(message[-1])
+						worker_set.add(message[-1])
+					worker_seen[message[-1]] = time.time()
+				
+				###  Drop the workers that left or went silent and send their jobs again.
+				lost_list = [name for name in worker_set if time.time() - worker_seen[name] > REQUEUE_SECONDS]
+				if message is not None and message[0] == 'bye':
+					lost_list.append(message[1])
+				for name in lost_list:
+					worker_set.discard(name)
+					worker_seen.pop(name, None)
+					lost_jobs = sorted([k for k in taken_dict if taken_dict[k] == name and k in out_set])
+					if lost_jobs:
+						print "Worker %s is gone, sending its %d jobs again"%(name, len(lost_jobs))
+					for k in lost_jobs:
+						del taken_dict[k]
+						task_queue.put(job_list[k])
+				
+				if message is None:
+					run.progress.tick()
+					continue
+				elif message[0] == 'taken' and message[2] == i and message[1] in out_set:
+					taken_dict[message[1]] = message[3]
+				elif message[0] == 'result' and message[2] == i and message[1] in out_set:
+					c_index, c_dict, c_seconds = message[1], prop_counter_from_bytes(message[3]), message[4]
+					out_set.remove(c_index)
+					taken_dict.pop(c_index, None)
+					prop_dict = merge_props(prop_dict,c_dict)
+					cost_model.observe(job_list[c_index][1], i, c_seconds)
+					checkpoint['done'].extend(job_list[c_index][1])
+					run.progress.job_done(c_index)
+					c_root = job_list[c_index][1][0]
+					if run.cache is not None and get_subtree_size(c_root, i) >= CACHE_MIN_SIZE:
+						run.cache.put(c_root, i, c_dict)
+					if run.checkpoint_due():
+						run.save()
+			
+			###  Throw away the copies of jobs sent again that nobody took.  (Results from the 
+			###  ones that were taken are for another bound and get ignored.)
+			while True:
+				try:
+					task_queue.get(False)
+				except Queue.Empty:
+					break
+			
+			run.finish_bound(i, prop_dict)
+			print "Cost model: %.3g seconds per unit of size for 1 mod 3 roots, %.3g for 2 mod 3 roots"%(cost_model.get_rate(1), cost_model.get_rate(2))
+		
+		run.report_bound(i, prop_dict, True)
+	
+	run.close()
+	
+	###  Tell the workers to stop and wait for them to say bye (for at most REQUEUE_SECONDS) 
+	###  before the queues go away.  Workers that never got a stop find the coordinator gone.
+	while True:
+		try:
+			message = result_queue.get(False)
+		except Queue.Empty:
+			break
+		if message[0] == 'hello':
+			worker_set.add(message[1])
+	for name in worker_set:
+		task_queue.put(None)
+	while worker_set:
+		try:
+			message = result_queue.get(True, REQUEUE_SECONDS)
+		except Queue.Empty:
+			break
+		if message[0] == 'hello':		#Late, but it needs a stop too.
+			worker_set.add(message[1])
+			task_queue.put(None)
+		elif message[0] == 'bye':
+			worker_set.discard(message[1])
+	for process in process_list:
+		process.join(REQUEUE_SECONDS)
+	manager.shutdown()
+	for process in process_list:
+		if process.is_alive():
+			process.terminate()
+
+	return 'done'